@@ -79,11 +79,11 @@ class DatabaseManager:
                 SELECT timestamp, pm2_5, pm10, dBA, vibration
                 FROM sensor_data 
                 WHERE device_id = :device_id 
-                AND timestamp >= NOW() - INTERVAL '24 hours'
+                AND timestamp >= NOW() - :hours * INTERVAL '1 hour'
                 ORDER BY timestamp DESC 
                 LIMIT :max_readings
                 """
-                result = await conn.execute(text(query), {"device_id": device_id, "max_readings": max_readings})
+                result = await conn.execute(text(query), {"device_id": device_id, "hours": hours, "max_readings": max_readings})
                 rows = result.fetchall()
                 
                 # Convert to list of dictionaries
@@ -115,11 +115,11 @@ class DatabaseManager:
                 FROM sensor_data 
                 WHERE device_id = :device_id 
                 AND {sensor_type} IS NOT NULL
-                AND timestamp >= NOW() - INTERVAL '24 hours'
+                AND timestamp >= NOW() - :hours * INTERVAL '1 hour'
                 ORDER BY timestamp DESC 
                 LIMIT :max_readings
                 """
-                result = await conn.execute(text(query), {"device_id": device_id, "max_readings": max_readings})
+                result = await conn.execute(text(query), {"device_id": device_id, "hours": hours, "max_readings": max_readings})
                 rows = result.fetchall()
                 
                 # Convert to list of dictionaries
@@ -227,4 +227,47 @@ class DatabaseManager:
             logger.error(f"Failed to save model metadata: {e}")
             return False
 
+    async def save_model_metadata_batch(self, rows: List[tuple]) -> bool:
+        if not rows:
+            return True
+        try:
+            now = datetime.now()
+            params = [
+                {
+                    "device_id": device_id,
+                    "sensor_type": sensor_type,
+                    "model_type": metadata.get('model_type'),
+                    "trained_at": now,
+                    "accuracy": metadata.get('accuracy'),
+                    "config": str(metadata.get('config', {})),
+                    "last_updated": now
+                }
+                for device_id, sensor_type, metadata in rows
+            ]
+
+            async with self.async_engine.begin() as conn:
+                query = """
+                INSERT INTO ml_models (
+                    device_id, sensor_type, model_type, trained_at, 
+                    accuracy, config, last_updated
+                ) VALUES (:device_id, :sensor_type, :model_type, :trained_at, :accuracy, :config, :last_updated)
+                ON CONFLICT (device_id, sensor_type) 
+                DO UPDATE SET 
+                    model_type = EXCLUDED.model_type,
+                    trained_at = EXCLUDED.trained_at,
+                    accuracy = EXCLUDED.accuracy,
+                    config = EXCLUDED.config,
+                    last_updated = EXCLUDED.last_updated
+                """
+
+                # executemany: one round-trip for the whole batch
+                await conn.execute(text(query), params)
+
+            logger.info(f"Saved model metadata for {len(params)} models")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to save model metadata batch: {e}")
+            return False
+
 db_manager = DatabaseManager()
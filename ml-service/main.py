@@ -395,6 +395,8 @@ async def train_all_models(background_tasks: BackgroundTasks):
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
+    # uvicorn's default loop="auto" picks up uvloop from uvicorn[standard]
+    # here and under the CLI launch the container uses
     uvicorn.run(
         "main:app",
         host=SERVICE_HOST,
@@ -5,16 +5,33 @@ This package provides modular, pluggable anomaly detection capabilities
 for time-series environmental sensor data using various ML approaches.
 """
 
+import importlib
+
 from .ml_detector import MLDetector
 from .base import BaseDetector
 from .zscore_detector import ZScoreDetector
-from .stl_detector import STLDetector
-from .lstm_detector import LSTMDetector
+
+# STL and LSTM pull in statsmodels and TensorFlow respectively; resolve them
+# lazily so importing the package stays cheap for zscore-only deployments.
+_LAZY_DETECTORS = {
+    'STLDetector': '.stl_detector',
+    'LSTMDetector': '.lstm_detector'
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_DETECTORS:
+        module = importlib.import_module(_LAZY_DETECTORS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     'MLDetector',
-    'BaseDetector', 
+    'BaseDetector',
     'ZScoreDetector',
     'STLDetector',
     'LSTMDetector'
-] 
\ No newline at end of file
+]
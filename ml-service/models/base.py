@@ -5,13 +5,41 @@ Defines the interface that all detector implementations must follow.
 """
 
 import logging
+import os
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Tuple, Any
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple, Any, Union
 from datetime import datetime
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Lightweight reading record: avoids the per-access dict hashing that
+# plain reading dicts pay in the fit/predict hot paths.
+Reading = namedtuple('Reading', ['timestamp', 'value'])
+
+
+class SensorSeries:
+    """
+    Columnar (struct-of-arrays) view of a batch of readings.
+
+    Holds one contiguous timestamps array and one values array instead of a
+    list of per-reading dicts, so it can be built once at the pipeline
+    boundary and shared by every downstream consumer without re-parsing.
+    """
+
+    __slots__ = ('timestamps', 'values')
+
+    def __init__(self, timestamps, values):
+        self.timestamps = np.asarray(timestamps)
+        self.values = np.asarray(values, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __bool__(self):
+        return len(self.values) > 0
+
 class BaseDetector(ABC):
     """
     Abstract base class for all anomaly detectors.
@@ -67,6 +95,22 @@ class BaseDetector(ABC):
         """
         pass
     
+    def predict_batch(self, sensor_id: str, readings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Predict anomaly types for a batch of readings.
+
+        The default implementation loops over `predict`; subclasses with a
+        vectorized scoring path should override this.
+
+        Args:
+            sensor_id: Unique identifier for the sensor
+            readings: List of reading dictionaries
+
+        Returns:
+            List of prediction result dictionaries, one per reading
+        """
+        return [self.predict(sensor_id, reading) for reading in readings]
+
     def validate_input(self, readings: List[Dict[str, Any]]) -> bool:
         """
         Validate input data format and values.
@@ -80,34 +124,44 @@ class BaseDetector(ABC):
         if not readings:
             logger.warning(f"{self.name}: Empty readings list")
             return False
-            
-        for i, reading in enumerate(readings):
-            if not isinstance(reading, dict):
-                logger.error(f"{self.name}: Reading {i} is not a dictionary")
+
+        if isinstance(readings, SensorSeries):
+            # Columnar input: validate the whole value array in one pass
+            if not np.isfinite(readings.values).all():
+                logger.error(f"{self.name}: Non-finite value in readings")
                 return False
-                
-            if 'timestamp' not in reading or 'value' not in reading:
-                logger.error(f"{self.name}: Reading {i} missing required keys")
+            return True
+
+        for i, reading in enumerate(readings):
+            if isinstance(reading, Reading):
+                timestamp, value = reading.timestamp, reading.value
+            elif isinstance(reading, dict):
+                if 'timestamp' not in reading or 'value' not in reading:
+                    logger.error(f"{self.name}: Reading {i} missing required keys")
+                    return False
+                timestamp, value = reading['timestamp'], reading['value']
+            else:
+                logger.error(f"{self.name}: Reading {i} is not a dictionary or Reading")
                 return False
-                
+
             try:
                 # Validate timestamp
-                if isinstance(reading['timestamp'], str):
-                    datetime.fromisoformat(reading['timestamp'].replace('Z', '+00:00'))
-                elif not isinstance(reading['timestamp'], datetime):
+                if isinstance(timestamp, str):
+                    datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+                elif not isinstance(timestamp, datetime):
                     logger.error(f"{self.name}: Invalid timestamp type in reading {i}")
                     return False
-                    
+
                 # Validate value
-                value = float(reading['value'])
+                value = float(value)
                 if not np.isfinite(value):
                     logger.error(f"{self.name}: Non-finite value in reading {i}")
                     return False
-                    
+
             except (ValueError, TypeError) as e:
                 logger.error(f"{self.name}: Invalid data in reading {i}: {e}")
                 return False
-                
+
         return True
     
     def extract_time_series(self, readings: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
@@ -120,20 +174,45 @@ class BaseDetector(ABC):
         Returns:
             Tuple of (timestamps, values) as numpy arrays
         """
+        if isinstance(readings, SensorSeries):
+            return readings.timestamps, readings.values
+
         timestamps = []
         values = []
-        
+
         for reading in readings:
-            # Convert timestamp to datetime if string
-            if isinstance(reading['timestamp'], str):
-                ts = datetime.fromisoformat(reading['timestamp'].replace('Z', '+00:00'))
+            if isinstance(reading, Reading):
+                ts, value = reading.timestamp, reading.value
             else:
-                ts = reading['timestamp']
-                
+                ts, value = reading['timestamp'], reading['value']
+
+            # Convert timestamp to datetime if string
+            if isinstance(ts, str):
+                ts = datetime.fromisoformat(ts.replace('Z', '+00:00'))
+
             timestamps.append(ts)
-            values.append(float(reading['value']))
-            
+            values.append(float(value))
+
         return np.array(timestamps), np.array(values)
+
+    def fit_arrays(self, sensor_id: str, timestamps: np.ndarray, values: np.ndarray) -> bool:
+        """
+        Train the detector from pre-extracted arrays.
+
+        Callers that already hold columnar data (e.g. straight from the
+        database layer) can use this entry point and skip per-reading dict
+        construction: the arrays are wrapped in a SensorSeries and handed to
+        `fit` without any per-element boxing.
+
+        Args:
+            sensor_id: Unique identifier for the sensor
+            timestamps: Array of timestamps (datetime or ISO strings)
+            values: Array of float sensor values
+
+        Returns:
+            True if training was successful, False otherwise
+        """
+        return self.fit(sensor_id, SensorSeries(timestamps, values))
     
     def save_model(self, sensor_id: str, filepath: str) -> bool:
         """
@@ -158,6 +237,29 @@ class BaseDetector(ABC):
             logger.error(f"{self.name}: Failed to save model for sensor {sensor_id}: {e}")
             return False
     
+    def save_models(self, items: List[Tuple[str, str]]) -> int:
+        """
+        Save several trained sensor models in one batch.
+
+        Parent directories are created once per unique path up front, so
+        mass retraining jobs avoid a makedirs syscall per sensor.
+
+        Args:
+            items: List of (sensor_id, filepath) pairs
+
+        Returns:
+            Number of models saved successfully
+        """
+        for parent in {os.path.dirname(fp) for _, fp in items}:
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+
+        saved = 0
+        for sensor_id, filepath in items:
+            if self.save_model(sensor_id, filepath):
+                saved += 1
+        return saved
+
     def load_model(self, sensor_id: str, filepath: str) -> bool:
         """
         Load trained model for a sensor from disk.
@@ -173,14 +275,28 @@ class BaseDetector(ABC):
             # Implementation specific to each detector
             success = self._load_model_impl(sensor_id, filepath)
             if success:
-                self.sensor_models[sensor_id] = True  # Mark as loaded
+                if sensor_id not in self.sensor_models:
+                    # Mark as loaded; detectors that keep their real state
+                    # in sensor_models have already registered it and must
+                    # not have it clobbered by the flag
+                    self.sensor_models[sensor_id] = True
                 logger.info(f"{self.name}: Loaded model for sensor {sensor_id}")
             return success
             
         except Exception as e:
             logger.error(f"{self.name}: Failed to load model for sensor {sensor_id}: {e}")
             return False
-    
+
+    def _drop_sensor_state(self, sensor_id: str) -> None:
+        """
+        Release per-sensor state held outside sensor_models.
+
+        Called when a sensor is evicted from a bounded resident-model
+        mapping. Detectors whose heavy state lives in sensor_models need
+        nothing here; detectors that keep parallel per-sensor dicts
+        override this so eviction actually frees the memory.
+        """
+
     @abstractmethod
     def _save_model_impl(self, sensor_id: str, filepath: str) -> bool:
         """Implementation-specific model saving."""
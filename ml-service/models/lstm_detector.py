@@ -76,6 +76,8 @@ class LSTMDetector(BaseDetector):
         self.models = {}
         self.scalers = {}
         self.thresholds = {}
+        self._infer_fns = {}
+        self._created_dirs = set()
         
     def fit(self, sensor_id: str, readings: List[Dict[str, Any]]) -> bool:
         """
@@ -141,18 +143,32 @@ class LSTMDetector(BaseDetector):
                 verbose=0
             )
             
-            # Calculate anomaly threshold
-            y_pred = model.predict(X_scaled, verbose=0)
+            # Calculate anomaly threshold. Call the model directly instead of
+            # model.predict() to skip the Keras batching/callback machinery;
+            # chunk the forward pass to bound memory on long histories.
+            batch_size = self.config['batch_size']
+            y_pred = np.concatenate([
+                model(X_scaled[i:i + batch_size], training=False).numpy()
+                for i in range(0, len(X_scaled), batch_size)
+            ])
             y_pred_original = scaler.inverse_transform(y_pred.reshape(-1, 1)).flatten()
             y_original = scaler.inverse_transform(y_scaled.reshape(-1, 1)).flatten()
             
             errors = np.abs(y_original - y_pred_original)
-            threshold = np.mean(errors) + self.config['threshold_multiplier'] * np.std(errors)
+            # Single pass over the error array: mean/std via sum and sum of
+            # squares instead of two separate O(N) reductions.
+            n = len(errors)
+            s1 = errors.sum()
+            s2 = errors.dot(errors)
+            error_mean = s1 / n
+            error_std = np.sqrt(max(s2 / n - error_mean * error_mean, 0.0))
+            threshold = error_mean + self.config['threshold_multiplier'] * error_std
             
             # Store model and components
             self.models[sensor_id] = model
             self.scalers[sensor_id] = scaler
             self.thresholds[sensor_id] = threshold
+            self._infer_fns[sensor_id] = self._build_infer_fn(model, scaler)
             
             # Initialize rolling window with historical data
             if not hasattr(self, 'rolling_windows'):
@@ -167,13 +183,15 @@ class LSTMDetector(BaseDetector):
             logger.error(f"{self.name}: Training failed for sensor {sensor_id}: {e}")
             return False
     
-    def predict(self, sensor_id: str, reading: Dict[str, Any]) -> Dict[str, Any]:
+    def predict(self, sensor_id: str, reading: Dict[str, Any],
+                include_details: bool = True) -> Dict[str, Any]:
         """
         Predict anomaly type for a new reading.
         
         Args:
             sensor_id: Sensor identifier
             reading: Reading dictionary with timestamp and value
+            include_details: Skip the diagnostics dict when False
             
         Returns:
             Prediction results dictionary
@@ -197,25 +215,30 @@ class LSTMDetector(BaseDetector):
                 return self._fallback_prediction(reading, "Insufficient recent data")
             
             # Prepare sequence for prediction
-            sequence = np.array(recent_values[-self.config['sequence_length']:])
-            sequence_scaled = scaler.transform(sequence.reshape(-1, 1))
-            
+            sequence = np.array(recent_values[-self.config['sequence_length']:]).reshape(-1, 1)
+
             # Get the expected input shape from the model
             expected_shape = model.input_shape
             if expected_shape[1] != self.config['sequence_length']:
                 # Adjust sequence length to match model's expected input
-                if len(sequence_scaled) > expected_shape[1]:
-                    sequence_scaled = sequence_scaled[-expected_shape[1]:]
+                if len(sequence) > expected_shape[1]:
+                    sequence = sequence[-expected_shape[1]:]
                 else:
                     # Pad with zeros if sequence is too short
-                    padding = np.zeros((expected_shape[1] - len(sequence_scaled), 1))
-                    sequence_scaled = np.vstack([padding, sequence_scaled])
-            
-            sequence_reshaped = sequence_scaled.reshape(1, -1, 1)
-            
-            # Make prediction
-            prediction_scaled = model.predict(sequence_reshaped, verbose=0)
-            prediction = scaler.inverse_transform(prediction_scaled)[0][0]
+                    padding = np.zeros((expected_shape[1] - len(sequence), 1))
+                    sequence = np.vstack([padding, sequence])
+
+            # Make prediction through the precompiled graph when available;
+            # scaling is folded into the graph, so it takes raw values
+            infer_fn = self._infer_fns.get(sensor_id)
+            if infer_fn is not None:
+                sequence_reshaped = sequence.reshape(1, -1, 1).astype(np.float32)
+                prediction = float(infer_fn(sequence_reshaped).numpy()[0][0])
+            else:
+                sequence_scaled = scaler.transform(sequence)
+                sequence_reshaped = sequence_scaled.reshape(1, -1, 1).astype(np.float32)
+                prediction_scaled = model.predict(sequence_reshaped, verbose=0)
+                prediction = scaler.inverse_transform(prediction_scaled)[0][0]
             
             # Calculate error
             error = abs(value - prediction)
@@ -230,13 +253,38 @@ class LSTMDetector(BaseDetector):
                 'category': category,
                 'confidence': confidence,
                 'anomaly_score': min(error / threshold, 1.0),
-                'details': details
+                'details': details if include_details else {}
             }
             
         except Exception as e:
             logger.error(f"{self.name}: Prediction failed for sensor {sensor_id}: {e}")
             return self._fallback_prediction(reading, str(e))
     
+    def _build_infer_fn(self, model, scaler):
+        """
+        Wrap scaling, forward pass and inverse scaling in one tf.function
+        with a fixed input signature.
+
+        Pinning shape and dtype prevents TensorFlow from retracing the graph
+        when inputs drift (e.g. float64 NumPy arrays), which otherwise shows
+        up as intermittent latency spikes during steady-state inference.
+        Folding the MinMaxScaler parameters into the graph as constants also
+        removes the NumPy->TF round trip per call: the function takes raw
+        sensor values and returns a raw-scale prediction.
+        """
+        seq_len = model.input_shape[1]
+        scale = float(scaler.scale_[0])
+        offset = float(scaler.min_[0])
+
+        @tf.function(input_signature=[
+            tf.TensorSpec(shape=(None, seq_len, 1), dtype=tf.float32)
+        ])
+        def infer(x):
+            y = model(x * scale + offset, training=False)
+            return (y - offset) / scale
+
+        return infer
+
     def _build_model(self, sequence_length: int) -> tf.keras.Model:
         """Build LSTM model architecture."""
         model = Sequential([
@@ -338,9 +386,13 @@ class LSTMDetector(BaseDetector):
             if sensor_id not in self.models:
                 return False
                 
-            # Create directory if it doesn't exist
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
-            
+            # Create directory if it doesn't exist (checked once per directory,
+            # not once per save)
+            parent_dir = os.path.dirname(filepath)
+            if parent_dir and parent_dir not in self._created_dirs:
+                os.makedirs(parent_dir, exist_ok=True)
+                self._created_dirs.add(parent_dir)
+
             # Save model
             model_path = f"{filepath}_model.keras"
             self.models[sensor_id].save(model_path)
@@ -348,11 +400,11 @@ class LSTMDetector(BaseDetector):
             # Save scaler and threshold
             scaler_path = f"{filepath}_scaler.pkl"
             with open(scaler_path, 'wb') as f:
-                pickle.dump(self.scalers[sensor_id], f)
+                pickle.dump(self.scalers[sensor_id], f, protocol=pickle.HIGHEST_PROTOCOL)
             
             threshold_path = f"{filepath}_threshold.pkl"
             with open(threshold_path, 'wb') as f:
-                pickle.dump(self.thresholds[sensor_id], f)
+                pickle.dump(self.thresholds[sensor_id], f, protocol=pickle.HIGHEST_PROTOCOL)
                 
             logger.info(f"{self.name}: Saved model for sensor {sensor_id} to {filepath}")
             return True
@@ -370,7 +422,7 @@ class LSTMDetector(BaseDetector):
                 return False
                 
             self.models[sensor_id] = load_model(model_path)
-            
+
             # Load scaler
             scaler_path = f"{filepath}_scaler.pkl"
             with open(scaler_path, 'rb') as f:
@@ -380,10 +432,23 @@ class LSTMDetector(BaseDetector):
             threshold_path = f"{filepath}_threshold.pkl"
             with open(threshold_path, 'rb') as f:
                 self.thresholds[sensor_id] = pickle.load(f)
-                
+
+            self._infer_fns[sensor_id] = self._build_infer_fn(
+                self.models[sensor_id], self.scalers[sensor_id])
+
             logger.info(f"{self.name}: Loaded model for sensor {sensor_id} from {filepath}")
             return True
             
         except Exception as e:
             logger.error(f"{self.name}: Failed to load model: {e}")
-            return False 
\ No newline at end of file
+            return False
+
+    def _drop_sensor_state(self, sensor_id: str) -> None:
+        """Release the model, scaler, threshold, compiled inference fn
+        and rolling window."""
+        self.models.pop(sensor_id, None)
+        self.scalers.pop(sensor_id, None)
+        self.thresholds.pop(sensor_id, None)
+        self._infer_fns.pop(sensor_id, None)
+        if hasattr(self, 'rolling_windows'):
+            self.rolling_windows.pop(sensor_id, None)
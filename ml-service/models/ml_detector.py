@@ -5,19 +5,96 @@ Coordinates multiple detector backends and provides a unified interface
 for anomaly detection across different sensor types.
 """
 
+import functools
+import glob
+import importlib
 import logging
 import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any, Union
 from datetime import datetime
 import numpy as np
 
-from .base import BaseDetector
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+from .base import BaseDetector, SensorSeries
 from .zscore_detector import ZScoreDetector
-from .stl_detector import STLDetector
-from .lstm_detector import LSTMDetector
 
 logger = logging.getLogger(__name__)
 
+# Fixed category order for integer-coded ensemble voting
+CATEGORIES = ('normal', 'noise', 'drift', 'alert')
+CATEGORY_INDEX = {category: i for i, category in enumerate(CATEGORIES)}
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def _season_kernel(x):
+        """Compute mean, variance and the lag-5/10/20 seasonality test in one pass."""
+        n = x.shape[0]
+        s = 0.0
+        for i in range(n):
+            s += x[i]
+        mean = s / n
+
+        var_sum = 0.0
+        for i in range(n):
+            d = x[i] - mean
+            var_sum += d * d
+        variance = var_sum / n
+
+        has_seasonality = False
+        if var_sum > 0.0:
+            for lag in (5, 10, 20):
+                if lag < n:
+                    acc = 0.0
+                    for i in range(n - lag):
+                        acc += (x[i] - mean) * (x[i + lag] - mean)
+                    if acc > 0.3 * var_sum:
+                        has_seasonality = True
+                        break
+        return has_seasonality, variance, mean
+
+    # Warm the compilation cache so the first real call doesn't pay JIT latency
+    _season_kernel(np.zeros(50, dtype=np.float64))
+else:
+    _season_kernel = None
+
+class _ModelLRU(OrderedDict):
+    """
+    Bounded mapping for per-sensor detector state.
+
+    When the number of resident sensors exceeds maxsize, the least recently
+    used entry is flushed to disk (via the eviction callback) and dropped,
+    keeping memory flat on services tracking thousands of sensors. Evicted
+    sensors are reloaded from disk on their next prediction.
+    """
+
+    def __init__(self, maxsize, on_evict):
+        super().__init__()
+        self._maxsize = maxsize
+        self._on_evict = on_evict
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self._maxsize:
+            oldest = next(iter(self))
+            # Flush while the entry is still resident so save_model sees it
+            self._on_evict(oldest)
+            del self[oldest]
+
+
 class MLDetector:
     """
     Main ML Detector orchestrator that manages multiple detector backends.
@@ -27,12 +104,22 @@ class MLDetector:
     based on data characteristics and fall back to simpler methods when needed.
     """
     
-    # Available detector types
+    # Available detector types. The heavy backends (statsmodels for STL,
+    # TensorFlow for LSTM) are kept as lazy (module, class) specs and only
+    # imported on first use, so zscore-only deployments don't pay their
+    # import time and memory footprint.
     DETECTOR_TYPES = {
         'zscore': ZScoreDetector,
-        'stl': STLDetector,
-        'lstm': LSTMDetector
+        'stl': ('.stl_detector', 'STLDetector'),
+        'lstm': ('.lstm_detector', 'LSTMDetector')
     }
+
+    # Model directories already created by any instance in this process
+    _dirs_created = set()
+
+    # Persisted models older than this are ignored when restoring the
+    # registry at startup
+    _REGISTRY_MAX_AGE_S = 7 * 24 * 3600
     
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """
@@ -53,7 +140,8 @@ class MLDetector:
             'min_data_for_advanced': 200,
             'confidence_threshold': 0.5,
             'enable_ensemble': False,
-            'ensemble_weights': {'zscore': 0.3, 'stl': 0.4, 'lstm': 0.3}
+            'ensemble_weights': {'zscore': 0.3, 'stl': 0.4, 'lstm': 0.3},
+            'max_resident_sensors': None  # bound per-detector model memory
         }
         
         if config:
@@ -63,30 +151,118 @@ class MLDetector:
         self.detectors = {}
         self.sensor_configs = {}  # Per-sensor detector configurations
         self.ensemble_mode = self.config['enable_ensemble']
+        # Hot-path knobs promoted to attributes; the per-reading predict
+        # path shouldn't pay a config dict hash per access
+        self._conf_threshold = float(default_config['confidence_threshold'])
+        self._model_dir = default_config['model_dir']
+        self._default_detector = default_config['default_detector']
+        self._auto_select = bool(default_config['auto_select'])
+        self._min_data_for_advanced = int(default_config['min_data_for_advanced'])
+        self._ensemble_weights = default_config['ensemble_weights']
+        self._max_resident_sensors = default_config['max_resident_sensors']
+        # Detector predictions spend most of their time in NumPy/TF kernels
+        # that release the GIL, so ensemble members can run concurrently
+        self._ensemble_pool = None
+        if self.ensemble_mode:
+            self._ensemble_pool = ThreadPoolExecutor(
+                max_workers=max(len(self.config['ensemble_weights']), 1),
+                thread_name_prefix='ensemble')
+        # Memoized data-characteristics analyses keyed by a cheap fingerprint
+        # of the readings, so re-fits on unchanged data skip the autocorrelation
+        self._analysis_cache = OrderedDict()
+        self._analysis_cache_size = 512
         
         # Initialize default detector
         self._initialize_detector(self.config['default_detector'])
-        
-        # Create model directory
-        os.makedirs(self.config['model_dir'], exist_ok=True)
-        
+
+        # Create model directory (once per process for a given path)
+        if self.config['model_dir'] not in MLDetector._dirs_created:
+            os.makedirs(self.config['model_dir'], exist_ok=True)
+            MLDetector._dirs_created.add(self.config['model_dir'])
+
+        # Pick up models persisted by a previous process so a restart
+        # doesn't force a full refit of the fleet
+        self._restore_registry()
+
         logger.info(f"MLDetector initialized with config: {self.config}")
-    
-    def _initialize_detector(self, detector_type: str) -> bool:
-        """Initialize a detector of the specified type."""
+
+    def _restore_registry(self) -> None:
+        """
+        Rebuild sensor_configs from models persisted under model_dir.
+
+        Without this a restarted process starts empty and every
+        prediction falls back until the next training cycle refits the
+        whole fleet. Model files are named "{sensor_id}_{detector_type}";
+        only the registry entry is rebuilt here - the detector state
+        itself loads lazily on first predict. Files untouched for a week
+        are skipped so long-dead sensors don't resurrect.
+        """
+        try:
+            now = time.time()
+            with os.scandir(self._model_dir) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    name = entry.name
+                    if name.endswith('_lstm_model.keras'):
+                        # LSTM persists several files per sensor; the keras
+                        # model is the anchor, and load_model expects the
+                        # shared "{sensor_id}_lstm" stem
+                        sensor_id = name[:-len('_lstm_model.keras')]
+                        detector_type = 'lstm'
+                        model_path = os.path.join(self._model_dir,
+                                                  f"{sensor_id}_lstm")
+                    else:
+                        sensor_id, sep, detector_type = name.rpartition('_')
+                        if not sep or detector_type not in self.DETECTOR_TYPES:
+                            continue
+                        model_path = entry.path
+                    mtime = entry.stat().st_mtime
+                    if now - mtime > self._REGISTRY_MAX_AGE_S:
+                        continue
+                    if sensor_id in self.sensor_configs:
+                        continue
+                    self.sensor_configs[sensor_id] = {
+                        'detector_type': detector_type,
+                        'trained_at_ns': int(mtime * 1e9),
+                        'readings_count': 0,
+                        'model_path': model_path
+                    }
+            if self.sensor_configs:
+                logger.info(f"Restored {len(self.sensor_configs)} persisted sensor models "
+                            f"from {self._model_dir}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Failed to restore model registry: {e}")
+
+    def _initialize_detector(self, detector_type: str) -> Optional[BaseDetector]:
+        """Initialize and cache a detector of the specified type, returning it."""
         try:
             if detector_type not in self.DETECTOR_TYPES:
                 logger.error(f"Unknown detector type: {detector_type}")
-                return False
-                
+                return None
+
             detector_class = self.DETECTOR_TYPES[detector_type]
-            self.detectors[detector_type] = detector_class()
+            if not isinstance(detector_class, type):
+                # Lazy spec: import the module now and cache the class back
+                module_name, class_name = detector_class
+                module = importlib.import_module(module_name, package=__package__)
+                detector_class = getattr(module, class_name)
+                self.DETECTOR_TYPES[detector_type] = detector_class
+            detector = self.detectors[detector_type] = detector_class()
+            if self._max_resident_sensors:
+                # Bound how many sensors' state stays resident per detector;
+                # evicted entries are flushed to disk and reloaded on demand
+                detector.sensor_models = _ModelLRU(
+                    self._max_resident_sensors,
+                    functools.partial(self._flush_sensor_model, detector_type))
             logger.info(f"Initialized {detector_type} detector")
-            return True
-            
+            return detector
+
         except Exception as e:
             logger.error(f"Failed to initialize {detector_type} detector: {e}")
-            return False
+            return None
     
     def fit(self, sensor_id: str, readings: List[Dict[str, Any]], 
             detector_type: Optional[str] = None) -> bool:
@@ -105,31 +281,49 @@ class MLDetector:
             if not readings:
                 logger.warning(f"No readings provided for sensor {sensor_id}")
                 return False
-            
+
+            # Extract the value column once; detector selection only needs
+            # values, so timestamp parsing is deferred until a detector is
+            # actually going to train
+            if isinstance(readings, SensorSeries):
+                series = readings
+                values = series.values
+                ts_ends = (str(series.timestamps[0]), str(series.timestamps[-1]))
+            else:
+                series = None
+                values = self._extract_values_only(readings)
+                ts_ends = (str(readings[0]['timestamp']), str(readings[-1]['timestamp']))
+
             # Auto-select detector if not specified
-            if detector_type is None and self.config['auto_select']:
-                detector_type = self._select_best_detector(sensor_id, readings)
+            if detector_type is None and self._auto_select:
+                detector_type = self._select_best_detector(sensor_id, values, ts_ends)
             elif detector_type is None:
-                detector_type = self.config['default_detector']
+                detector_type = self._default_detector
             
             # Initialize detector if not already done
-            if detector_type not in self.detectors:
-                if not self._initialize_detector(detector_type):
-                    return False
-            
-            # Train the detector
-            detector = self.detectors[detector_type]
-            success = detector.fit(sensor_id, readings)
+            detector = self.detectors.get(detector_type) or self._initialize_detector(detector_type)
+            if detector is None:
+                return False
+
+            # Train the detector on the shared columnar series
+            if series is None:
+                series = SensorSeries(self._extract_timestamps(readings), values)
+            success = detector.fit(sensor_id, series)
             
             if success:
+                # Model path is fixed for a (sensor, detector) pair; build it
+                # once here so predict doesn't redo the join per call
+                model_path = os.path.join(self._model_dir, f"{sensor_id}_{detector_type}")
+                # Store the raw clock reading; formatting to ISO happens
+                # lazily in get_sensor_info, not once per fit
                 self.sensor_configs[sensor_id] = {
                     'detector_type': detector_type,
-                    'trained_at': datetime.now().isoformat(),
-                    'readings_count': len(readings)
+                    'trained_at_ns': time.time_ns(),
+                    'readings_count': len(readings),
+                    'model_path': model_path
                 }
-                
+
                 # Save model
-                model_path = os.path.join(self.config['model_dir'], f"{sensor_id}_{detector_type}")
                 detector.save_model(sensor_id, model_path)
                 
                 logger.info(f"Trained {detector_type} detector for sensor {sensor_id}")
@@ -139,14 +333,115 @@ class MLDetector:
         except Exception as e:
             logger.error(f"Training failed for sensor {sensor_id}: {e}")
             return False
-    
-    def predict(self, sensor_id: str, reading: Dict[str, Any]) -> Dict[str, Any]:
+
+    def fit_arrays(self, sensor_id: str, timestamps: np.ndarray, values: np.ndarray,
+                   detector_type: Optional[str] = None) -> bool:
+        """
+        Train detectors from pre-extracted columnar arrays.
+
+        Callers that already hold a timestamps array and a values array
+        (e.g. the training manager's database projection) can hand them
+        over directly without building per-reading dictionaries.
+
+        Args:
+            sensor_id: Sensor identifier
+            timestamps: Array of timestamps (datetime or ISO strings)
+            values: Array of float sensor values
+            detector_type: Specific detector type to use (optional)
+
+        Returns:
+            True if training successful
+        """
+        return self.fit(sensor_id, SensorSeries(timestamps, values), detector_type)
+
+    def fit_many(self, items: List[tuple],
+                 detector_type: Optional[str] = None) -> Dict[str, bool]:
+        """
+        Train several sensors, grouping them by backend.
+
+        Sensors resolving to the same detector are handed to that
+        detector's fit_many in one call, so backends with a parallel fit
+        path (zscore and STL dispatch across cores via joblib) train the
+        whole group at once; backends without one fall back to per-sensor
+        fit. Registry bookkeeping and model persistence match fit().
+
+        Args:
+            items: List of (sensor_id, timestamps, values) triples
+            detector_type: Force one detector type for all sensors (optional)
+
+        Returns:
+            Mapping of sensor_id to training success
+        """
+        results = {}
+        try:
+            # Resolve each sensor's backend, then group
+            groups = {}
+            for sensor_id, timestamps, values in items:
+                if len(values) == 0:
+                    results[sensor_id] = False
+                    continue
+                series = SensorSeries(timestamps, values)
+                chosen = detector_type
+                if chosen is None and self._auto_select:
+                    ts_ends = (str(series.timestamps[0]), str(series.timestamps[-1]))
+                    chosen = self._select_best_detector(sensor_id, series.values, ts_ends)
+                elif chosen is None:
+                    chosen = self._default_detector
+                groups.setdefault(chosen, []).append((sensor_id, series))
+
+            for chosen, group in groups.items():
+                detector = self.detectors.get(chosen) or self._initialize_detector(chosen)
+                if detector is None:
+                    for sensor_id, _ in group:
+                        results[sensor_id] = False
+                    continue
+
+                batch_fit = getattr(detector, 'fit_many', None)
+                if batch_fit is not None:
+                    outcome = batch_fit(dict(group))
+                else:
+                    outcome = {sensor_id: detector.fit(sensor_id, series)
+                               for sensor_id, series in group}
+
+                to_save = []
+                now_ns = time.time_ns()
+                for sensor_id, series in group:
+                    success = outcome.get(sensor_id, False)
+                    results[sensor_id] = success
+                    if not success:
+                        continue
+                    model_path = os.path.join(self._model_dir,
+                                              f"{sensor_id}_{chosen}")
+                    self.sensor_configs[sensor_id] = {
+                        'detector_type': chosen,
+                        'trained_at_ns': now_ns,
+                        'readings_count': len(series),
+                        'model_path': model_path
+                    }
+                    to_save.append((sensor_id, model_path))
+                if to_save:
+                    detector.save_models(to_save)
+                    logger.info(f"Trained {len(to_save)} sensors on the "
+                                f"{chosen} detector")
+
+            return results
+
+        except Exception as e:
+            logger.error(f"Batch training failed: {e}")
+            for sensor_id, _, _ in items:
+                results.setdefault(sensor_id, False)
+            return results
+
+    def predict(self, sensor_id: str, reading: Dict[str, Any],
+                include_details: bool = True) -> Dict[str, Any]:
         """
         Predict anomaly type for a new reading.
         
         Args:
             sensor_id: Sensor identifier
             reading: Reading dictionary with timestamp and value
+            include_details: Forwarded to the detector; when False the
+                per-reading diagnostics dict is skipped entirely
             
         Returns:
             Prediction results dictionary
@@ -156,19 +451,32 @@ class MLDetector:
             if sensor_id not in self.sensor_configs:
                 return self._fallback_prediction(reading, "No trained model")
             
-            detector_type = self.sensor_configs[sensor_id]['detector_type']
-            
-            if detector_type not in self.detectors:
+            sensor_config = self.sensor_configs[sensor_id]
+            detector_type = sensor_config['detector_type']
+
+            detector = self.detectors.get(detector_type)
+            if detector is None:
                 # Try to load the model
-                model_path = os.path.join(self.config['model_dir'], f"{sensor_id}_{detector_type}")
-                if not self._load_detector_model(detector_type, sensor_id, model_path):
+                if not self._load_detector_model(detector_type, sensor_id,
+                                                 sensor_config['model_path']):
                     return self._fallback_prediction(reading, "Failed to load model")
-            
-            detector = self.detectors[detector_type]
-            prediction = detector.predict(sensor_id, reading)
+                detector = self.detectors[detector_type]
+
+            if sensor_id not in detector.sensor_models:
+                # Model state was evicted or never loaded in this process
+                if not detector.load_model(sensor_id, sensor_config['model_path']):
+                    return self._fallback_prediction(reading, "Failed to load model")
+            else:
+                # Touch the entry so the bounded registry evicts by
+                # prediction recency rather than fit order; not every
+                # detector reads sensor_models on its own hot path
+                detector.sensor_models[sensor_id]
+
+            prediction = detector.predict(sensor_id, reading,
+                                          include_details=include_details)
             
             # Apply confidence threshold
-            if prediction['confidence'] < self.config['confidence_threshold']:
+            if prediction['confidence'] < self._conf_threshold:
                 prediction['category'] = 'normal'
                 prediction['confidence'] = 0.1
             
@@ -178,6 +486,63 @@ class MLDetector:
             logger.error(f"Prediction failed for sensor {sensor_id}: {e}")
             return self._fallback_prediction(reading, str(e))
     
+    def predict_batch(self, sensor_id: str, readings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Predict anomaly types for a batch of readings.
+
+        Resolves the sensor's detector and configuration once for the whole
+        batch, so the per-reading cost is just the detector's scoring work
+        rather than repeated dict lookups and model-path checks.
+
+        Args:
+            sensor_id: Sensor identifier
+            readings: List of reading dictionaries
+
+        Returns:
+            List of prediction result dictionaries, one per reading
+        """
+        try:
+            if not readings:
+                return []
+
+            if sensor_id not in self.sensor_configs:
+                return [self._fallback_prediction(r, "No trained model") for r in readings]
+
+            sensor_config = self.sensor_configs[sensor_id]
+            detector_type = sensor_config['detector_type']
+
+            detector = self.detectors.get(detector_type)
+            if detector is None:
+                if not self._load_detector_model(detector_type, sensor_id,
+                                                 sensor_config['model_path']):
+                    return [self._fallback_prediction(r, "Failed to load model") for r in readings]
+                detector = self.detectors[detector_type]
+
+            if sensor_id not in detector.sensor_models:
+                # Model state was evicted or never loaded in this process
+                if not detector.load_model(sensor_id, sensor_config['model_path']):
+                    return [self._fallback_prediction(r, "Failed to load model") for r in readings]
+            else:
+                # Touch the entry so the bounded registry evicts by
+                # prediction recency rather than fit order; not every
+                # detector reads sensor_models on its own hot path
+                detector.sensor_models[sensor_id]
+
+            predictions = detector.predict_batch(sensor_id, readings)
+
+            # Apply confidence threshold in one pass
+            threshold = self._conf_threshold
+            for prediction in predictions:
+                if prediction['confidence'] < threshold:
+                    prediction['category'] = 'normal'
+                    prediction['confidence'] = 0.1
+
+            return predictions
+
+        except Exception as e:
+            logger.error(f"Batch prediction failed for sensor {sensor_id}: {e}")
+            return [self._fallback_prediction(r, str(e)) for r in readings]
+
     def predict_ensemble(self, sensor_id: str, reading: Dict[str, Any]) -> Dict[str, Any]:
         """
         Make ensemble prediction using multiple detectors.
@@ -193,16 +558,20 @@ class MLDetector:
             return self.predict(sensor_id, reading)
         
         predictions = {}
-        weights = self.config['ensemble_weights']
-        
-        # Get predictions from all available detectors
-        for detector_type, detector in self.detectors.items():
-            if detector_type in weights and sensor_id in detector.sensor_models:
-                try:
-                    pred = detector.predict(sensor_id, reading)
-                    predictions[detector_type] = pred
-                except Exception as e:
-                    logger.warning(f"Ensemble prediction failed for {detector_type}: {e}")
+        weights = self._ensemble_weights
+
+        # Run all eligible detectors concurrently; wall time approaches the
+        # slowest member instead of the sum of all of them
+        futures = {
+            detector_type: self._ensemble_pool.submit(detector.predict, sensor_id, reading)
+            for detector_type, detector in self.detectors.items()
+            if detector_type in weights and sensor_id in detector.sensor_models
+        }
+        for detector_type, future in futures.items():
+            try:
+                predictions[detector_type] = future.result()
+            except Exception as e:
+                logger.warning(f"Ensemble prediction failed for {detector_type}: {e}")
         
         if not predictions:
             return self._fallback_prediction(reading, "No ensemble predictions available")
@@ -210,25 +579,33 @@ class MLDetector:
         # Combine predictions using weighted voting
         return self._combine_predictions(predictions, weights)
     
-    def _select_best_detector(self, sensor_id: str, readings: List[Dict[str, Any]]) -> str:
+    def _select_best_detector(self, sensor_id: str, values: np.ndarray,
+                              ts_ends: tuple) -> str:
         """
         Auto-select the best detector based on data characteristics.
-        
+
         Args:
             sensor_id: Sensor identifier
-            readings: Historical readings
-            
+            values: Historical values array
+            ts_ends: (first, last) raw timestamps, used for the cache key
+
         Returns:
             Selected detector type
         """
-        if len(readings) < self.config['min_data_for_advanced']:
+        if len(values) < self._min_data_for_advanced:
             return 'zscore'  # Fallback to simple detector
-        
-        # Extract time series data
-        timestamps, values = self._extract_time_series(readings)
-        
-        # Analyze data characteristics
-        data_stats = self._analyze_data_characteristics(values)
+
+        # Analyze data characteristics (memoized on a cheap fingerprint)
+        cache_key = (sensor_id, len(values), ts_ends[0], ts_ends[1],
+                     round(float(values.sum()), 6))
+        data_stats = self._analysis_cache.get(cache_key)
+        if data_stats is None:
+            data_stats = self._analyze_data_characteristics(values)
+            self._analysis_cache[cache_key] = data_stats
+            if len(self._analysis_cache) > self._analysis_cache_size:
+                self._analysis_cache.popitem(last=False)
+        else:
+            self._analysis_cache.move_to_end(cache_key)
         
         # Select detector based on characteristics
         if data_stats['has_seasonality'] and len(values) >= 100:
@@ -240,25 +617,50 @@ class MLDetector:
     
     def _analyze_data_characteristics(self, values: np.ndarray) -> Dict[str, Any]:
         """Analyze data characteristics to select appropriate detector."""
+        if _season_kernel is not None and len(values) >= 50:
+            # Single JIT-compiled pass over the series when numba is installed
+            has_seasonality, variance, mean = _season_kernel(
+                np.ascontiguousarray(values, dtype=np.float64))
+            stats = {
+                'has_seasonality': bool(has_seasonality),
+                'complex_patterns': False,
+                'variance': variance,
+                'mean': mean
+            }
+
+            # Complexity detection (high variance and non-linear patterns)
+            if stats['variance'] > 0.1 * stats['mean']**2:
+                stats['complex_patterns'] = True
+
+            return stats
+
+        # Compute the mean once and derive the variance from the centered
+        # array, so the series is only walked twice in total
+        mean = float(values.mean())
+        centered = values - mean
+        variance = centered.dot(centered) / len(values) if len(values) else 0.0
+
         stats = {
             'has_seasonality': False,
             'complex_patterns': False,
-            'variance': np.var(values),
-            'mean': np.mean(values)
+            'variance': variance,
+            'mean': mean
         }
-        
+
         # Simple seasonality detection (check for periodic patterns)
         if len(values) >= 50:
-            # Calculate autocorrelation
-            autocorr = np.correlate(values - np.mean(values), 
-                                  values - np.mean(values), mode='full')
-            autocorr = autocorr[len(autocorr)//2:]
-            
+            # Only lags 5/10/20 are inspected, so compute those three
+            # autocorrelation terms directly as dot products instead of the
+            # full O(N^2) np.correlate over all lags
+            autocorr_zero = centered.dot(centered)
+
             # Check for significant autocorrelation at different lags
-            for lag in [5, 10, 20]:
-                if lag < len(autocorr) and autocorr[lag] > 0.3 * autocorr[0]:
-                    stats['has_seasonality'] = True
-                    break
+            if autocorr_zero > 0:
+                for lag in [5, 10, 20]:
+                    if (lag < len(centered) and
+                            centered[:-lag].dot(centered[lag:]) > 0.3 * autocorr_zero):
+                        stats['has_seasonality'] = True
+                        break
         
         # Complexity detection (high variance and non-linear patterns)
         if stats['variance'] > 0.1 * stats['mean']**2:
@@ -266,49 +668,53 @@ class MLDetector:
         
         return stats
     
+    def _extract_values_only(self, readings: List[Dict[str, Any]]) -> np.ndarray:
+        """Extract just the value column, skipping timestamp parsing."""
+        return np.fromiter((float(r['value']) for r in readings),
+                           dtype=np.float64, count=len(readings))
+
+    def _extract_timestamps(self, readings: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Extract and parse just the timestamp column.
+
+        Branches once on the timestamp type instead of per reading. ISO
+        strings go straight through NumPy's C datetime64 parser rather
+        than per-element datetime.fromisoformat calls; only the 'Z'
+        suffix needs stripping first.
+        """
+        ts_raw = [r['timestamp'] for r in readings]
+        if ts_raw and isinstance(ts_raw[0], str):
+            return np.array([ts[:-1] if ts.endswith('Z') else ts for ts in ts_raw],
+                            dtype='datetime64[ns]')
+        return np.array(ts_raw, dtype='datetime64[ns]')
+
     def _extract_time_series(self, readings: List[Dict[str, Any]]) -> tuple:
         """Extract time series data from readings."""
-        timestamps = []
-        values = []
-        
-        for reading in readings:
-            if isinstance(reading['timestamp'], str):
-                ts = datetime.fromisoformat(reading['timestamp'].replace('Z', '+00:00'))
-            else:
-                ts = reading['timestamp']
-                
-            timestamps.append(ts)
-            values.append(float(reading['value']))
-            
-        return np.array(timestamps), np.array(values)
+        return self._extract_timestamps(readings), self._extract_values_only(readings)
     
     def _combine_predictions(self, predictions: Dict[str, Dict[str, Any]], 
                            weights: Dict[str, float]) -> Dict[str, Any]:
         """Combine multiple predictions using weighted voting."""
-        # Category voting
-        categories = {}
-        total_confidence = 0
-        total_anomaly_score = 0
-        total_weight = 0
-        
-        for detector_type, pred in predictions.items():
-            weight = weights.get(detector_type, 0.1)
-            category = pred['category']
-            
-            if category not in categories:
-                categories[category] = 0
-            categories[category] += weight
-            
-            total_confidence += pred['confidence'] * weight
-            total_anomaly_score += pred.get('anomaly_score', 0) * weight
-            total_weight += weight
-        
+        # Gather weights, confidences, scores and integer category codes into
+        # flat arrays so the voting is a single bincount/argmax reduction
+        types = list(predictions)
+        n = len(types)
+        w = np.fromiter((weights.get(t, 0.1) for t in types), dtype=np.float64, count=n)
+        confidences = np.fromiter((predictions[t]['confidence'] for t in types),
+                                  dtype=np.float64, count=n)
+        scores = np.fromiter((predictions[t].get('anomaly_score', 0) for t in types),
+                             dtype=np.float64, count=n)
+        category_codes = np.fromiter((CATEGORY_INDEX.get(predictions[t]['category'], 0)
+                                      for t in types), dtype=np.intp, count=n)
+
         # Select category with highest weight
-        best_category = max(categories.items(), key=lambda x: x[1])[0]
-        
+        votes = np.bincount(category_codes, weights=w, minlength=len(CATEGORIES))
+        best_category = CATEGORIES[int(votes.argmax())]
+
         # Calculate weighted averages
-        avg_confidence = total_confidence / total_weight if total_weight > 0 else 0
-        avg_anomaly_score = total_anomaly_score / total_weight if total_weight > 0 else 0
+        total_weight = w.sum()
+        avg_confidence = float(w @ confidences / total_weight) if total_weight > 0 else 0
+        avg_anomaly_score = float(w @ scores / total_weight) if total_weight > 0 else 0
         
         return {
             'category': best_category,
@@ -321,14 +727,27 @@ class MLDetector:
             }
         }
     
+    def _flush_sensor_model(self, detector_type: str, sensor_id: str):
+        """Persist a sensor's model state before it is evicted from memory."""
+        try:
+            detector = self.detectors.get(detector_type)
+            sensor_config = self.sensor_configs.get(sensor_id)
+            if detector is not None and sensor_config is not None:
+                detector.save_model(sensor_id, sensor_config['model_path'])
+                # The LRU only holds the sensor_models entry; companion
+                # state (stats dicts, compiled inference fns) must be
+                # dropped explicitly or eviction frees nothing
+                detector._drop_sensor_state(sensor_id)
+        except Exception as e:
+            logger.error(f"Failed to flush evicted model for {sensor_id}: {e}")
+
     def _load_detector_model(self, detector_type: str, sensor_id: str, model_path: str) -> bool:
         """Load a trained model for a detector."""
         try:
-            if detector_type not in self.detectors:
-                if not self._initialize_detector(detector_type):
-                    return False
-            
-            detector = self.detectors[detector_type]
+            detector = self.detectors.get(detector_type) or self._initialize_detector(detector_type)
+            if detector is None:
+                return False
+
             return detector.load_model(sensor_id, model_path)
             
         except Exception as e:
@@ -358,7 +777,7 @@ class MLDetector:
         info = {
             'sensor_id': sensor_id,
             'detector_type': detector_type,
-            'trained_at': config['trained_at'],
+            'trained_at': datetime.fromtimestamp(config['trained_at_ns'] / 1e9).isoformat(),
             'readings_count': config['readings_count']
         }
         
@@ -380,8 +799,9 @@ class MLDetector:
             if sensor_id not in self.sensor_configs:
                 return False
             
-            detector_type = self.sensor_configs[sensor_id]['detector_type']
-            
+            sensor_config = self.sensor_configs[sensor_id]
+            detector_type = sensor_config['detector_type']
+
             # Remove from detector
             if detector_type in self.detectors:
                 if sensor_id in self.detectors[detector_type].sensor_models:
@@ -389,12 +809,18 @@ class MLDetector:
             
             # Remove from config
             del self.sensor_configs[sensor_id]
+
+            # Invalidate cached analyses for this sensor
+            for key in [k for k in self._analysis_cache if k[0] == sensor_id]:
+                del self._analysis_cache[key]
             
-            # Remove model files
-            model_path = os.path.join(self.config['model_dir'], f"{sensor_id}_{detector_type}")
-            for ext in ['', '_model.h5', '_scaler.pkl', '_threshold.pkl']:
+            # Remove model files; the set of produced files varies by detector
+            # type, so match everything under the model path prefix
+            model_path = sensor_config.get('model_path') or os.path.join(
+                self._model_dir, f"{sensor_id}_{detector_type}")
+            for path in glob.iglob(f"{glob.escape(model_path)}*"):
                 try:
-                    os.remove(f"{model_path}{ext}")
+                    os.unlink(path)
                 except FileNotFoundError:
                     pass
             
@@ -5,22 +5,61 @@ Uses STL decomposition to separate trend, seasonal, and residual components
 for more sophisticated anomaly detection.
 """
 
+import functools
+import importlib.util
 import logging
 import pickle
 import os
+from collections import deque
 from typing import Dict, List, Optional, Any
 import numpy as np
 from datetime import datetime, timedelta
 
+# statsmodels pulls in pandas and friends (>200ms cold start), so only
+# check availability here and defer the real import to first use
+_STATSMODELS_AVAILABLE = importlib.util.find_spec('statsmodels') is not None
+_STL_cls = None
+
+
+def _get_stl():
+    """Import statsmodels' STL on first use and cache the class."""
+    global _STL_cls
+    if _STL_cls is None:
+        from statsmodels.tsa.seasonal import STL
+        _STL_cls = STL
+    return _STL_cls
+
 try:
-    from statsmodels.tsa.seasonal import STL
+    import joblib
 except ImportError:
-    STL = None
+    joblib = None
 
 from .base import BaseDetector
 
 logger = logging.getLogger(__name__)
 
+# Closed-form OLS constants for the fixed 10-point trend slope:
+# slope = (n*Σxy - Σx*Σy) / (n*Σx² - (Σx)²) with x = 0..9
+_TREND_N = 10
+_TREND_X = np.arange(_TREND_N, dtype=np.float64)
+_TREND_X_SUM = 45.0
+_TREND_DENOM = _TREND_N * 285.0 - _TREND_X_SUM * _TREND_X_SUM
+
+
+def _fit_one(sensor_id: str, readings: List[Dict[str, Any]],
+             config: Dict[str, Any]) -> tuple:
+    """
+    Fit one sensor in a joblib worker and return its picklable state.
+
+    Module-level so it pickles cleanly for the loky backend; only the
+    cached incremental state and statistics travel back to the parent
+    process.
+    """
+    detector = STLDetector(config)
+    if not detector.fit(sensor_id, readings):
+        return sensor_id, None, None
+    return sensor_id, detector.sensor_models[sensor_id], detector.sensor_stats[sensor_id]
+
 class STLDetector(BaseDetector):
     """
     STL decomposition based anomaly detector.
@@ -43,8 +82,9 @@ class STLDetector(BaseDetector):
                 - residual_threshold: Threshold for residual anomalies (default: 2.0)
                 - trend_threshold: Threshold for trend changes (default: 0.1)
                 - min_readings: Minimum readings for training (default: 100)
+                - refit_every: Readings between full STL refits (default: 48)
         """
-        if STL is None:
+        if not _STATSMODELS_AVAILABLE:
             raise ImportError("statsmodels is required for STLDetector. "
                             "Install with: pip install statsmodels")
         
@@ -56,17 +96,43 @@ class STLDetector(BaseDetector):
             'residual_threshold': 2.0,
             'trend_threshold': 0.1,
             'min_readings': 100,
-            'seasonal_periods': 2  # Minimum seasonal periods for training
+            'seasonal_periods': 2,  # Minimum seasonal periods for training
+            'refit_every': 48,  # Readings between full STL refits on the window
+            'evenly_spaced': True  # Hourly data: skip per-reading timestamp parsing
         }
         
         if config:
             default_config.update(config)
             
         super().__init__("STLDetector", default_config)
-        
+
         # Per-sensor models and statistics
         self.sensor_models = {}
         self.sensor_stats = {}
+
+        # Hot-path config scalars promoted to attributes; predict shouldn't
+        # pay a dict hash per threshold read
+        self._period = int(self.config['period'])
+        self._res_thr = float(self.config['residual_threshold'])
+        self._res_thr_2x = self._res_thr * 2.0
+        self._trend_thr = float(self.config['trend_threshold'])
+        self._refit_every = int(self.config['refit_every'])
+        self._evenly_spaced = bool(self.config['evenly_spaced'])
+
+        # Struct-of-arrays mirror of the per-sensor statistics read on the
+        # predict hot path, indexed via _sensor_index (sensor_id -> row).
+        # The sensor_stats dicts remain the source of truth for save/load.
+        self._sensor_index = {}
+        self._res_mean = np.empty(0)
+        self._res_inv_std = np.empty(0)
+        self._seas_mean = np.empty(0)
+        self._seas_inv_std = np.empty(0)
+        self._overall_mean = np.empty(0)
+        self._overall_std = np.empty(0)
+
+        # STL constructor with the fixed parameters bound; built lazily so
+        # the deferred statsmodels import still happens on first use
+        self._make_stl = None
         
     def fit(self, sensor_id: str, readings: List[Dict[str, Any]]) -> bool:
         """
@@ -88,8 +154,14 @@ class STLDetector(BaseDetector):
                              f"({len(readings)} < {self.config['min_readings']})")
                 return False
                 
-            # Extract time series data
-            timestamps, values = self.extract_time_series(readings)
+            # Extract time series data. STL already assumes evenly spaced
+            # (hourly) readings, so by default skip per-reading timestamp
+            # parsing and build the value array in one typed pass.
+            if (self._evenly_spaced and isinstance(readings, list)
+                    and readings and isinstance(readings[0], dict)):
+                timestamps, values = self.extract_time_series_fast(readings)
+            else:
+                timestamps, values = self.extract_time_series(readings)
             
             # Ensure we have enough data for seasonal decomposition
             min_required = self.config['period'] * self.config['seasonal_periods']
@@ -109,14 +181,23 @@ class STLDetector(BaseDetector):
             seasonal_stats = self._calculate_component_stats(stl_result.seasonal)
             residual_stats = self._calculate_component_stats(stl_result.resid)
             
-            # Store model and statistics
-            self.sensor_models[sensor_id] = {
-                'stl_result': stl_result,
-                'last_values': values[-self.config['period']:].tolist(),
-                'last_timestamps': timestamps[-self.config['period']:].tolist(),
+            # Store model and statistics. The rolling window lives in a
+            # preallocated circular ndarray end-to-end: no list round-trips
+            # on update and no np.array() re-wrap on predict.
+            capacity = self._period * 2
+            tail = np.asarray(values[-self._period:], dtype=np.float64)
+            win_buf = np.zeros(capacity, dtype=np.float64)
+            win_buf[:len(tail)] = tail
+            model_data = {
+                'win_buf': win_buf,
+                'win_head': len(tail) % capacity,
+                'win_count': len(tail),
+                'last_timestamps': deque(timestamps[-self._period:].tolist(),
+                                         maxlen=capacity),
                 'total_readings': len(values)
             }
-            
+            self._refresh_incremental_state(model_data, stl_result)
+
             self.sensor_stats[sensor_id] = {
                 'trend': trend_stats,
                 'seasonal': seasonal_stats,
@@ -124,21 +205,79 @@ class STLDetector(BaseDetector):
                 'overall_mean': np.mean(values),
                 'overall_std': np.std(values)
             }
+            self._register_sensor_stats(sensor_id)
+            # Fits run on executor threads while predictions serve on the
+            # event loop, and sensor_models membership is the gate predict
+            # checks - so it must become visible only after the stats it
+            # depends on, same as zscore publishing its trained flag last
+            self.sensor_models[sensor_id] = model_data
             logger.info(f"{self.name}: Trained on {len(readings)} readings for sensor {sensor_id}")
             return True
             
         except Exception as e:
             logger.error(f"{self.name}: Training failed for sensor {sensor_id}: {e}")
             return False
-    
-    def predict(self, sensor_id: str, reading: Dict[str, Any]) -> Dict[str, Any]:
+
+    def extract_time_series_fast(self, readings: List[Dict[str, Any]]) -> tuple:
+        """
+        Extract (timestamps, values) assuming evenly-spaced dict readings.
+
+        The decomposition never looks at individual timestamps when the
+        spacing is uniform, so they are kept as-is instead of being parsed
+        per reading; values are collected with np.fromiter at a known
+        length and dtype.
+        """
+        n = len(readings)
+        values = np.fromiter((r['value'] for r in readings),
+                             dtype=np.float64, count=n)
+        timestamps = np.asarray([r['timestamp'] for r in readings], dtype=object)
+        return timestamps, values
+
+    def fit_many(self, sensor_readings: Dict[str, List[Dict[str, Any]]],
+                 n_jobs: int = -1) -> Dict[str, bool]:
+        """
+        Train several sensors at once, dispatching across CPU cores.
+
+        Each STL decomposition is independent and CPU-bound, so batch
+        retraining parallelizes across processes via joblib when it is
+        available; otherwise sensors are fitted serially.
+
+        Args:
+            sensor_readings: Mapping of sensor_id to reading lists
+            n_jobs: Worker processes (-1 = all cores)
+
+        Returns:
+            Mapping of sensor_id to training success
+        """
+        if joblib is None or len(sensor_readings) <= 1:
+            return {sid: self.fit(sid, readings)
+                    for sid, readings in sensor_readings.items()}
+
+        results = joblib.Parallel(n_jobs=n_jobs)(
+            joblib.delayed(_fit_one)(sid, readings, self.config)
+            for sid, readings in sensor_readings.items())
+
+        outcome = {}
+        for sid, model_data, sensor_stats in results:
+            if model_data is None:
+                outcome[sid] = False
+                continue
+            self.sensor_models[sid] = model_data
+            self.sensor_stats[sid] = sensor_stats
+            self._register_sensor_stats(sid)
+            outcome[sid] = True
+        return outcome
+
+    def predict(self, sensor_id: str, reading: Dict[str, Any],
+                include_details: bool = True) -> Dict[str, Any]:
         """
         Predict anomaly type for a new reading.
         
         Args:
             sensor_id: Sensor identifier
             reading: Reading dictionary with timestamp and value
-            
+            include_details: Skip assembling the diagnostics dict when False
+
         Returns:
             Prediction results dictionary
         """
@@ -152,20 +291,22 @@ class STLDetector(BaseDetector):
             
             # Get sensor data
             model_data = self.sensor_models[sensor_id]
-            stats = self.sensor_stats[sensor_id]
-            
+            idx = self._sensor_index.get(sensor_id)
+            if idx is None:
+                idx = self._register_sensor_stats(sensor_id)
+
             # Update rolling window
             self._update_window(sensor_id, value, timestamp)
-            
+
             # Perform analysis on updated data
-            category, confidence, details = self._analyze_components(
-                sensor_id, value, model_data, stats
+            category, confidence, anomaly_score, details = self._analyze_components(
+                sensor_id, value, model_data, idx, include_details
             )
             
             return {
                 'category': category,
                 'confidence': confidence,
-                'anomaly_score': details.get('anomaly_score', 0.0),
+                'anomaly_score': anomaly_score,
                 'details': details
             }
             
@@ -176,120 +317,218 @@ class STLDetector(BaseDetector):
     def _perform_stl_decomposition(self, values: np.ndarray):
         """Perform STL decomposition on time series data."""
         try:
-            stl = STL(
-                values,
-                period=self.config['period'],
-                seasonal=self.config['seasonal_window'],
-                trend=self.config['trend_window'],
-                low_pass=self.config['low_pass_window']
-            )
-            return stl.fit()
+            if self._make_stl is None:
+                self._make_stl = functools.partial(
+                    _get_stl(),
+                    period=self.config['period'],
+                    seasonal=self.config['seasonal_window'],
+                    trend=self.config['trend_window'],
+                    low_pass=self.config['low_pass_window']
+                )
+            return self._make_stl(values).fit()
         except Exception as e:
             logger.error(f"{self.name}: STL decomposition failed: {e}")
             return None
     
+    def _register_sensor_stats(self, sensor_id: str) -> int:
+        """Mirror a sensor's stats dict into the SoA arrays, returning its row."""
+        stats = self.sensor_stats[sensor_id]
+        idx = self._sensor_index.get(sensor_id)
+        if idx is None:
+            idx = len(self._sensor_index)
+            self._sensor_index[sensor_id] = idx
+            if idx >= len(self._res_mean):
+                grow = max(16, len(self._res_mean) * 2)
+                for name in ('_res_mean', '_res_inv_std', '_seas_mean',
+                             '_seas_inv_std', '_overall_mean', '_overall_std'):
+                    old = getattr(self, name)
+                    new = np.empty(grow)
+                    new[:len(old)] = old
+                    setattr(self, name, new)
+        # Reciprocals stored so the hot path multiplies instead of guarding
+        # a division with max() per reading
+        self._res_mean[idx] = stats['residual']['mean']
+        self._res_inv_std[idx] = 1.0 / max(stats['residual']['std'], 1e-6)
+        self._seas_mean[idx] = stats['seasonal']['mean']
+        self._seas_inv_std[idx] = 1.0 / max(stats['seasonal']['std'], 1e-6)
+        self._overall_mean[idx] = stats['overall_mean']
+        self._overall_std[idx] = stats['overall_std']
+        return idx
+
+    def _refresh_incremental_state(self, model_data: Dict[str, Any], stl_result):
+        """
+        Cache the fitted components needed for incremental prediction.
+
+        Stores one seasonal cycle, the last trend value and its slope so
+        that `predict` can extrapolate the expected value with O(1)
+        arithmetic instead of re-running the full STL decomposition.
+        """
+        period = self._period
+        trend = np.asarray(stl_result.trend, dtype=np.float64)
+        seasonal = np.asarray(stl_result.seasonal, dtype=np.float64)
+
+        model_data['seasonal_cycle'] = seasonal[-period:].copy()
+        model_data['last_trend'] = float(trend[-1])
+        model_data['trend_mean'] = float(np.mean(trend))
+        model_data['inv_trend_mean'] = 1.0 / max(abs(model_data['trend_mean']), 1e-6)
+        # Slope of the trend tail, used to extrapolate between refits
+        tail = trend[-min(len(trend), period):]
+        model_data['trend_slope'] = float(
+            np.polyfit(range(len(tail)), tail, 1)[0]) if len(tail) >= 2 else 0.0
+        model_data['steps_since_fit'] = 0
+
     def _calculate_component_stats(self, component: np.ndarray) -> Dict[str, float]:
-        """Calculate statistics for a component."""
+        """Calculate statistics for a component in as few passes as possible."""
+        component = np.asarray(component, dtype=np.float64)
+        mn = component.min()
+        mx = component.max()
+        mean = component.mean()
+        centered = component - mean
+        std = np.sqrt(centered.dot(centered) / len(component))
         return {
-            'mean': np.mean(component),
-            'std': np.std(component),
-            'min': np.min(component),
-            'max': np.max(component),
-            'range': np.max(component) - np.min(component)
+            'mean': mean,
+            'std': std,
+            'min': mn,
+            'max': mx,
+            'range': mx - mn
         }
     
     def _update_window(self, sensor_id: str, value: float, timestamp: Any):
         """Update the rolling window with new data."""
         model_data = self.sensor_models[sensor_id]
-        
-        # Add new value
-        model_data['last_values'].append(value)
+        buf = model_data['win_buf']
+        head = model_data['win_head']
+
+        # Write into the circular buffer, overwriting the oldest value
+        # once the window is full
+        buf[head] = value
+        model_data['win_head'] = (head + 1) % len(buf)
+        if model_data['win_count'] < len(buf):
+            model_data['win_count'] += 1
+
         model_data['last_timestamps'].append(timestamp)
-        
-        # Remove oldest value if window is too large
-        if len(model_data['last_values']) > self.config['period'] * 2:
-            model_data['last_values'].pop(0)
-            model_data['last_timestamps'].pop(0)
-        
+
         model_data['total_readings'] += 1
+        model_data['steps_since_fit'] += 1
+
+    def _window_values(self, model_data: Dict[str, Any],
+                       k: Optional[int] = None) -> np.ndarray:
+        """Return the last k window values (all of them by default) in order."""
+        count = model_data['win_count']
+        if k is None or k > count:
+            k = count
+        buf = model_data['win_buf']
+        head = model_data['win_head']
+        indices = np.arange(head - k, head) % len(buf)
+        return buf[indices]
     
-    def _analyze_components(self, sensor_id: str, value: float, 
-                          model_data: Dict[str, Any], stats: Dict[str, Any]) -> tuple:
+    def _analyze_components(self, sensor_id: str, value: float,
+                          model_data: Dict[str, Any], idx: int,
+                          include_details: bool = True) -> tuple:
         """
         Analyze STL components to determine anomaly type.
-        
+
+        Prediction reuses the components cached at fit time: the expected
+        value is extrapolated as trend + slope * steps + seasonal cycle, so
+        each reading costs O(1) arithmetic. The full STL decomposition is
+        only re-run on the rolling window every `refit_every` readings to
+        keep the cached components fresh.
+
         Returns:
-            Tuple of (category, confidence, details)
+            Tuple of (category, confidence, anomaly_score, details);
+            details is empty when include_details is False
         """
         details = {
             'value': float(value),
-            'overall_mean': float(stats['overall_mean']),
-            'overall_std': float(stats['overall_std'])
-        }
-        
-        # Get recent values for analysis
-        recent_values = np.array(model_data['last_values'])
-        
+            'overall_mean': float(self._overall_mean[idx]),
+            'overall_std': float(self._overall_std[idx])
+        } if include_details else {}
+
+        period = self._period
+
         # Check if we have enough data for analysis
-        if len(recent_values) < self.config['period']:
-            return 'normal', 0.5, details
-        
-        # Perform STL decomposition on recent data
-        recent_stl = self._perform_stl_decomposition(recent_values)
-        if recent_stl is None:
-            return 'normal', 0.3, details
-        
-        # Analyze residual component for noise/outliers
-        residual = recent_stl.resid[-1]  # Latest residual
-        residual_stats = stats['residual']
-        residual_z_score = abs((residual - residual_stats['mean']) / 
-                              max(residual_stats['std'], 1e-6))
-        
-        details['residual'] = float(residual)
-        details['residual_z_score'] = float(residual_z_score)
-        
+        if model_data['win_count'] < period:
+            return 'normal', 0.5, 0.0, details
+
+        # Periodically refresh the cached components from the rolling window
+        steps = model_data['steps_since_fit']
+        if steps >= self._refit_every and model_data['win_count'] >= period * 2:
+            recent_stl = self._perform_stl_decomposition(self._window_values(model_data))
+            if recent_stl is not None:
+                self._refresh_incremental_state(model_data, recent_stl)
+                steps = 0
+
+        # Expected value from the cached decomposition; steps == 0 means the
+        # current reading was the last point of the just-fitted window
+        seasonal_cycle = model_data['seasonal_cycle']
+        if steps == 0:
+            expected = model_data['last_trend'] + seasonal_cycle[-1]
+        else:
+            expected = (model_data['last_trend'] +
+                        model_data['trend_slope'] * steps +
+                        seasonal_cycle[(steps - 1) % period])
+
+        # Analyze residual and seasonal deviations together: both z-scores
+        # derive from the same cached state, so compute them in one place
+        # instead of re-deriving the seasonal deviation further down
+        residual = value - expected
+        current_seasonal = seasonal_cycle[(steps - 1) % period]
+        residual_z_score = abs((residual - self._res_mean[idx]) *
+                               self._res_inv_std[idx])
+        seasonal_z_score = abs((current_seasonal - self._seas_mean[idx]) *
+                               self._seas_inv_std[idx])
+
+        if include_details:
+            details['residual'] = float(residual)
+            details['residual_z_score'] = float(residual_z_score)
+
         # Check for extreme residuals (alerts)
-        if residual_z_score > self.config['residual_threshold'] * 2:
-            details['anomaly_score'] = min(residual_z_score / (self.config['residual_threshold'] * 2), 1.0)
-            return 'alert', 0.9, details
-        
+        if residual_z_score > self._res_thr_2x:
+            anomaly_score = min(residual_z_score / self._res_thr_2x, 1.0)
+            if include_details:
+                details['anomaly_score'] = anomaly_score
+            return 'alert', 0.9, anomaly_score, details
+
         # Check for moderate residuals (noise)
-        if residual_z_score > self.config['residual_threshold']:
-            details['anomaly_score'] = min(residual_z_score / self.config['residual_threshold'], 1.0)
-            return 'noise', 0.7, details
-        
-        # Analyze trend component for drift
-        trend = recent_stl.trend
-        if len(trend) >= 10:
-            recent_trend = trend[-10:]
-            trend_slope = np.polyfit(range(len(recent_trend)), recent_trend, 1)[0]
-            trend_change = abs(trend_slope) / max(abs(np.mean(trend)), 1e-6)
-            
-            details['trend_slope'] = float(trend_slope)
-            details['trend_change'] = float(trend_change)
-            
-            if trend_change > self.config['trend_threshold']:
-                details['anomaly_score'] = min(trend_change / self.config['trend_threshold'], 1.0)
-                return 'drift', 0.6, details
-        
-        # Check for seasonal anomalies
-        seasonal = recent_stl.seasonal
-        if len(seasonal) >= self.config['period']:
-            current_seasonal = seasonal[-1]
-            seasonal_stats = stats['seasonal']
-            seasonal_z_score = abs((current_seasonal - seasonal_stats['mean']) / 
-                                  max(seasonal_stats['std'], 1e-6))
-            
+        if residual_z_score > self._res_thr:
+            anomaly_score = min(residual_z_score / self._res_thr, 1.0)
+            if include_details:
+                details['anomaly_score'] = anomaly_score
+            return 'noise', 0.7, anomaly_score, details
+
+        # Analyze trend for drift: slope of the last deseasonalized values
+        if model_data['win_count'] >= 10 and steps >= 10:
+            phases = np.arange(steps - 10, steps) % period
+            recent_trend = self._window_values(model_data, 10) - seasonal_cycle[phases]
+            trend_slope = ((_TREND_N * _TREND_X.dot(recent_trend) -
+                            _TREND_X_SUM * recent_trend.sum()) / _TREND_DENOM)
+            trend_change = abs(trend_slope) * model_data['inv_trend_mean']
+
+            if include_details:
+                details['trend_slope'] = float(trend_slope)
+                details['trend_change'] = float(trend_change)
+
+            if trend_change > self._trend_thr:
+                anomaly_score = min(trend_change / self._trend_thr, 1.0)
+                if include_details:
+                    details['anomaly_score'] = anomaly_score
+                return 'drift', 0.6, anomaly_score, details
+
+        # Check for seasonal anomalies against the cached cycle
+        if include_details:
             details['seasonal'] = float(current_seasonal)
             details['seasonal_z_score'] = float(seasonal_z_score)
-            
-            if seasonal_z_score > self.config['residual_threshold']:
-                details['anomaly_score'] = min(seasonal_z_score / self.config['residual_threshold'], 1.0)
-                return 'noise', 0.5, details
-        
+
+        if seasonal_z_score > self._res_thr:
+            anomaly_score = min(seasonal_z_score / self._res_thr, 1.0)
+            if include_details:
+                details['anomaly_score'] = anomaly_score
+            return 'noise', 0.5, anomaly_score, details
+
         # Normal reading
-        details['anomaly_score'] = 0.0
-        return 'normal', 0.8, details
+        if include_details:
+            details['anomaly_score'] = 0.0
+        return 'normal', 0.8, 0.0, details
     
     def _fallback_prediction(self, reading: Dict[str, Any], reason: str) -> Dict[str, Any]:
         """Fallback prediction when model is not available."""
@@ -310,16 +549,25 @@ class STLDetector(BaseDetector):
                 return False
                 
             # STL results can't be pickled directly, so we save the data
+            sensor_model = self.sensor_models[sensor_id]
             model_data = {
                 'sensor_stats': {sensor_id: self.sensor_stats[sensor_id]},
                 'config': self.config,
-                'last_values': self.sensor_models[sensor_id]['last_values'],
-                'last_timestamps': self.sensor_models[sensor_id]['last_timestamps'],
-                'total_readings': self.sensor_models[sensor_id]['total_readings']
+                'win_buf': sensor_model['win_buf'],
+                'win_head': sensor_model['win_head'],
+                'win_count': sensor_model['win_count'],
+                'last_timestamps': sensor_model['last_timestamps'],
+                'total_readings': sensor_model['total_readings'],
+                # Cached components for incremental prediction
+                'seasonal_cycle': sensor_model['seasonal_cycle'],
+                'last_trend': sensor_model['last_trend'],
+                'trend_slope': sensor_model['trend_slope'],
+                'trend_mean': sensor_model['trend_mean'],
+                'steps_since_fit': sensor_model['steps_since_fit']
             }
             
             with open(filepath, 'wb') as f:
-                pickle.dump(model_data, f)
+                pickle.dump(model_data, f, protocol=pickle.HIGHEST_PROTOCOL)
                 
             logger.info(f"{self.name}: Saved model for sensor {sensor_id} to {filepath}")
             return True
@@ -340,13 +588,35 @@ class STLDetector(BaseDetector):
             # Load sensor statistics
             if 'sensor_stats' in model_data and sensor_id in model_data['sensor_stats']:
                 self.sensor_stats[sensor_id] = model_data['sensor_stats'][sensor_id]
-            
+                self._register_sensor_stats(sensor_id)
+
             # Reconstruct model data
-            if 'last_values' in model_data:
+            if 'win_buf' in model_data or 'last_values' in model_data:
+                if 'win_buf' not in model_data:
+                    # Older model file: rebuild the circular window state
+                    capacity = self._period * 2
+                    tail = np.asarray(model_data['last_values'],
+                                      dtype=np.float64)[-capacity:]
+                    win_buf = np.zeros(capacity, dtype=np.float64)
+                    win_buf[:len(tail)] = tail
+                    model_data['win_buf'] = win_buf
+                    model_data['win_head'] = len(tail) % capacity
+                    model_data['win_count'] = len(tail)
                 self.sensor_models[sensor_id] = {
-                    'last_values': model_data['last_values'],
-                    'last_timestamps': model_data['last_timestamps'],
-                    'total_readings': model_data['total_readings']
+                    'win_buf': np.asarray(model_data['win_buf'], dtype=np.float64),
+                    'win_head': model_data['win_head'],
+                    'win_count': model_data['win_count'],
+                    'last_timestamps': deque(model_data['last_timestamps'],
+                                             maxlen=self._period * 2),
+                    'total_readings': model_data['total_readings'],
+                    'seasonal_cycle': np.asarray(
+                        model_data.get('seasonal_cycle',
+                                       np.zeros(self.config['period']))),
+                    'last_trend': model_data.get('last_trend', 0.0),
+                    'trend_slope': model_data.get('trend_slope', 0.0),
+                    'trend_mean': model_data.get('trend_mean', 0.0),
+                    'inv_trend_mean': 1.0 / max(abs(model_data.get('trend_mean', 0.0)), 1e-6),
+                    'steps_since_fit': model_data.get('steps_since_fit', 0)
                 }
             
             # Update config if provided
@@ -358,4 +628,12 @@ class STLDetector(BaseDetector):
             
         except Exception as e:
             logger.error(f"{self.name}: Failed to load model: {e}")
-            return False 
\ No newline at end of file
+            return False
+
+    def _drop_sensor_state(self, sensor_id: str) -> None:
+        """Release the stats dict mirrored alongside sensor_models.
+
+        The SoA row registered for the sensor is left in place; it is a
+        handful of floats and is overwritten when the model is reloaded.
+        """
+        self.sensor_stats.pop(sensor_id, None)
@@ -7,15 +7,144 @@ Simple statistical fallback detector using Z-score analysis for outlier detectio
 import logging
 import pickle
 import os
+from collections import deque
 from typing import Dict, List, Optional, Any
 import numpy as np
-from scipy import stats
 from datetime import datetime, timedelta
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import joblib
+except ImportError:
+    joblib = None
+
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None
+
 from .base import BaseDetector
 
 logger = logging.getLogger(__name__)
 
+
+def _fit_one(sensor_id: str, readings: List[Dict[str, Any]],
+             config: Dict[str, Any]) -> tuple:
+    """Fit one sensor in a joblib worker and return its picklable state."""
+    detector = ZScoreDetector(config)
+    if not detector.fit(sensor_id, readings):
+        return sensor_id, None
+    return sensor_id, detector.sensor_stats[sensor_id]
+
+# Kernel category codes -> (category, confidence)
+_KERNEL_RESULTS = (
+    ('normal', 0.8),
+    ('noise', 0.7),   # z-score outlier
+    ('drift', 0.6),
+    ('noise', 0.5),   # elevated recent variance
+    ('alert', 0.9)
+)
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def _classify_kernel(buf, head, count, mean, std, z_score,
+                         z_threshold, drift_threshold, noise_threshold):
+        """
+        Classify a reading from the circular buffer without Python overhead.
+
+        Returns (code, drift_ratio, noise_std) where code indexes
+        _KERNEL_RESULTS.
+        """
+        if z_score > z_threshold * 2.0:
+            return 4, 0.0, 0.0
+        if z_score > z_threshold:
+            return 1, 0.0, 0.0
+
+        window_size = buf.shape[0]
+
+        if count >= 10:
+            s = 0.0
+            for i in range(head - 10, head):
+                s += buf[i % window_size]
+            recent_mean = s / 10.0
+            denom = abs(mean)
+            if denom < 1e-6:
+                denom = 1e-6
+            drift_ratio = abs(recent_mean - mean) / denom
+            if drift_ratio > drift_threshold:
+                return 2, drift_ratio, 0.0
+
+        if count >= 5:
+            s = 0.0
+            sq = 0.0
+            for i in range(head - 5, head):
+                v = buf[i % window_size]
+                s += v
+                sq += v * v
+            m = s / 5.0
+            var = sq / 5.0 - m * m
+            if var < 0.0:
+                var = 0.0
+            recent_std = np.sqrt(var)
+            if recent_std > std * (1.0 + noise_threshold):
+                return 3, 0.0, recent_std
+
+        return 0, 0.0, 0.0
+
+    @njit(cache=True, fastmath=True)
+    def _step_kernel(buf, head, count, total, sumsq, value,
+                     z_threshold, drift_threshold, noise_threshold,
+                     prev_mean, prev_std):
+        """
+        One fully-incremental prediction step: z-score against the
+        pre-update statistics, circular-buffer update, then
+        classification — all in a single compiled call.
+
+        Returns (head, count, total, sumsq, mean, std, z, code,
+        drift_ratio, noise_std).
+        """
+        if prev_std > 0.0:
+            z = abs((value - prev_mean) / prev_std)
+        else:
+            z = 0.0
+
+        window_size = buf.shape[0]
+        if count == window_size:
+            old = buf[head]
+            total -= old
+            sumsq -= old * old
+        else:
+            count += 1
+        buf[head] = value
+        total += value
+        sumsq += value * value
+        head = (head + 1) % window_size
+
+        mean = total / count
+        var = sumsq / count - mean * mean
+        if var < 0.0:
+            var = 0.0
+        std = np.sqrt(var)
+
+        code, drift_ratio, noise_std = _classify_kernel(
+            buf, head, count, mean, std, z,
+            z_threshold, drift_threshold, noise_threshold)
+        return head, count, total, sumsq, mean, std, z, code, drift_ratio, noise_std
+
+    # Warm the compilation cache so the first real call doesn't pay JIT latency
+    _classify_kernel(np.zeros(16, dtype=np.float64), 0, 0, 0.0, 0.0, 0.0,
+                     3.0, 0.1, 0.05)
+    _step_kernel(np.zeros(16, dtype=np.float64), 0, 0, 0.0, 0.0, 1.0,
+                 3.0, 0.1, 0.05, 0.0, 0.0)
+else:
+    _classify_kernel = None
+    _step_kernel = None
+
 class ZScoreDetector(BaseDetector):
     """
     Z-Score based anomaly detector using statistical analysis.
@@ -75,18 +204,40 @@ class ZScoreDetector(BaseDetector):
             # Extract time series data
             timestamps, values = self.extract_time_series(readings)
             
-            # Calculate initial statistics
-            mean_val = np.mean(values)
-            std_val = np.std(values)
-            
+            # Calculate initial statistics; bottleneck's C reductions when
+            # installed, otherwise a fused NumPy pass
+            if bn is not None:
+                mean_val = bn.nanmean(values)
+                std_val = bn.nanstd(values)
+                min_val = bn.nanmin(values)
+                max_val = bn.nanmax(values)
+            else:
+                mean_val = values.mean()
+                centered = values - mean_val
+                std_val = np.sqrt(centered.dot(centered) / len(values))
+                min_val = values.min()
+                max_val = values.max()
+
+            # Preallocated circular buffer for the rolling window, plus
+            # running sum/sum-of-squares so updates are O(1) per reading
+            window_size = self.config['window_size']
+            tail = values[-window_size:]
+            buf = np.zeros(window_size, dtype=np.float64)
+            buf[:len(tail)] = tail
+
             # Store statistics for this sensor
             self.sensor_stats[sensor_id] = {
                 'mean': mean_val,
                 'std': std_val,
-                'min': np.min(values),
-                'max': np.max(values),
-                'last_values': values[-self.config['window_size']:].tolist(),
-                'last_timestamps': timestamps[-self.config['window_size']:].tolist(),
+                'min': min_val,
+                'max': max_val,
+                'buf': buf,
+                'head': len(tail) % window_size,
+                'count': len(tail),
+                'sum': float(tail.sum()),
+                'sumsq': float(tail.dot(tail)),
+                'last_timestamps': deque(timestamps[-window_size:].tolist(),
+                                         maxlen=window_size),
                 'total_readings': len(values)
             }
             
@@ -97,15 +248,51 @@ class ZScoreDetector(BaseDetector):
         except Exception as e:
             logger.error(f"{self.name}: Training failed for sensor {sensor_id}: {e}")
             return False
-    
-    def predict(self, sensor_id: str, reading: Dict[str, Any]) -> Dict[str, Any]:
+
+    def fit_many(self, sensor_readings: Dict[str, List[Dict[str, Any]]],
+                 n_jobs: int = -1) -> Dict[str, bool]:
+        """
+        Train several sensors at once, dispatching across CPU cores.
+
+        Mirrors STLDetector.fit_many: independent per-sensor fits are
+        parallelized via joblib when available, serial otherwise.
+
+        Args:
+            sensor_readings: Mapping of sensor_id to reading lists
+            n_jobs: Worker processes (-1 = all cores)
+
+        Returns:
+            Mapping of sensor_id to training success
+        """
+        if joblib is None or len(sensor_readings) <= 1:
+            return {sid: self.fit(sid, readings)
+                    for sid, readings in sensor_readings.items()}
+
+        results = joblib.Parallel(n_jobs=n_jobs)(
+            joblib.delayed(_fit_one)(sid, readings, self.config)
+            for sid, readings in sensor_readings.items())
+
+        outcome = {}
+        for sid, sensor_stats in results:
+            if sensor_stats is None:
+                outcome[sid] = False
+                continue
+            self.sensor_stats[sid] = sensor_stats
+            self.sensor_models[sid] = True
+            outcome[sid] = True
+        return outcome
+
+    def predict(self, sensor_id: str, reading: Dict[str, Any],
+                include_details: bool = True) -> Dict[str, Any]:
         """
         Predict anomaly type for a new reading.
         
         Args:
             sensor_id: Sensor identifier
             reading: Reading dictionary with timestamp and value
-            
+            include_details: Skip assembling the diagnostics dict when False;
+                >99%% of readings are normal and many callers never read it
+
         Returns:
             Prediction results dictionary
         """
@@ -119,16 +306,37 @@ class ZScoreDetector(BaseDetector):
             
             # Get sensor statistics
             stats = self.sensor_stats[sensor_id]
-            
+
+            # Fully-compiled path: score, buffer update and classification
+            # happen in one kernel call
+            if _step_kernel is not None:
+                return self._predict_compiled(stats, value, timestamp,
+                                              include_details)
+
             # Calculate Z-score
             z_score = abs((value - stats['mean']) / stats['std']) if stats['std'] > 0 else 0
             
             # Update rolling statistics
             self._update_stats(sensor_id, value, timestamp)
-            
+
+            # Constant-sensor fast path: with zero spread and an unchanged
+            # value none of the downstream checks can fire
+            if stats['std'] == 0 and value == stats['mean']:
+                return {
+                    'category': 'normal',
+                    'confidence': 0.8,
+                    'anomaly_score': 0.0,
+                    'details': {
+                        'z_score': 0.0,
+                        'mean': stats['mean'],
+                        'std': 0.0,
+                        'value': value
+                    } if include_details else {}
+                }
+
             # Determine category based on analysis
             category, confidence, details = self._classify_reading(
-                sensor_id, value, z_score, stats
+                sensor_id, value, z_score, stats, include_details
             )
             
             return {
@@ -141,28 +349,118 @@ class ZScoreDetector(BaseDetector):
         except Exception as e:
             logger.error(f"{self.name}: Prediction failed for sensor {sensor_id}: {e}")
             return self._fallback_prediction(reading, str(e))
-    
+
+    def predict_batch(self, sensor_id: str, readings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Predict anomaly types for a batch of readings.
+
+        Each reading is stepped through the exact scoring, rolling-stat
+        update and classification that `predict` applies, so a batch
+        classifies identically to feeding the readings one at a time.
+        With the compiled kernel available the sensor state is resolved
+        once and each step is a single kernel call; without it the loop
+        falls back to the base implementation.
+
+        Args:
+            sensor_id: Sensor identifier
+            readings: List of reading dictionaries
+
+        Returns:
+            List of prediction result dictionaries, one per reading
+        """
+        if _step_kernel is None:
+            return super().predict_batch(sensor_id, readings)
+
+        try:
+            if sensor_id not in self.sensor_models:
+                return [self._fallback_prediction(r, "Model not trained")
+                        for r in readings]
+
+            stats = self.sensor_stats[sensor_id]
+            return [self._predict_compiled(stats, float(r['value']),
+                                           r['timestamp'])
+                    for r in readings]
+
+        except Exception as e:
+            logger.error(f"{self.name}: Batch prediction failed for sensor {sensor_id}: {e}")
+            return [self._fallback_prediction(r, str(e)) for r in readings]
+
+    def _predict_compiled(self, stats: Dict[str, Any], value: float,
+                          timestamp: Any,
+                          include_details: bool = True) -> Dict[str, Any]:
+        """Run one prediction step through the compiled kernel."""
+        (stats['head'], stats['count'], stats['sum'], stats['sumsq'],
+         stats['mean'], stats['std'], z_score, code, drift_ratio,
+         noise_std) = _step_kernel(
+            stats['buf'], stats['head'], stats['count'],
+            stats['sum'], stats['sumsq'], value,
+            float(self.config['z_threshold']),
+            float(self.config['drift_threshold']),
+            float(self.config['noise_threshold']),
+            float(stats['mean']), float(stats['std']))
+
+        stats['last_timestamps'].append(timestamp)
+        stats['total_readings'] += 1
+
+        details = {
+            'z_score': float(z_score),
+            'mean': stats['mean'],
+            'std': stats['std'],
+            'value': value
+        } if include_details else {}
+        if include_details:
+            if code == 2:
+                details['drift_ratio'] = float(drift_ratio)
+            elif code == 3:
+                details['noise_std'] = float(noise_std)
+
+        category, confidence = _KERNEL_RESULTS[code]
+        return {
+            'category': category,
+            'confidence': confidence,
+            'anomaly_score': min(z_score / self.config['z_threshold'], 1.0),
+            'details': details
+        }
+
     def _update_stats(self, sensor_id: str, value: float, timestamp: Any):
-        """Update rolling statistics for a sensor."""
+        """Update rolling statistics for a sensor in O(1)."""
         stats = self.sensor_stats[sensor_id]
-        
-        # Add new value to rolling window
-        stats['last_values'].append(value)
+        window_size = self.config['window_size']
+        buf = stats['buf']
+        head = stats['head']
+
+        # Subtract the outgoing value's contribution once the window is full
+        if stats['count'] == window_size:
+            old = buf[head]
+            stats['sum'] -= old
+            stats['sumsq'] -= old * old
+        else:
+            stats['count'] += 1
+
+        # Write the new value into the circular buffer
+        buf[head] = value
+        stats['sum'] += value
+        stats['sumsq'] += value * value
+        stats['head'] = (head + 1) % window_size
+
         stats['last_timestamps'].append(timestamp)
-        
-        # Remove oldest value if window is full
-        if len(stats['last_values']) > self.config['window_size']:
-            stats['last_values'].pop(0)
-            stats['last_timestamps'].pop(0)
-        
-        # Recalculate statistics
-        values = np.array(stats['last_values'])
-        stats['mean'] = np.mean(values)
-        stats['std'] = np.std(values)
+
+        # Derive mean/std from the running sums instead of rescanning
+        n = stats['count']
+        mean = stats['sum'] / n
+        stats['mean'] = mean
+        stats['std'] = np.sqrt(max(stats['sumsq'] / n - mean * mean, 0.0))
         stats['total_readings'] += 1
+
+    def _recent_values(self, stats: Dict[str, Any], k: int) -> np.ndarray:
+        """Return the last k window values in chronological order."""
+        buf = stats['buf']
+        indices = np.arange(stats['head'] - k, stats['head']) % len(buf)
+        return buf[indices]
     
-    def _classify_reading(self, sensor_id: str, value: float, z_score: float, 
-                         stats: Dict[str, Any]) -> tuple:
+    def _classify_reading(self, sensor_id: str, value: float, z_score: float,
+                         stats: Dict[str, Any],
+                         include_details: bool = True) -> tuple:
         """
         Classify a reading into anomaly categories.
         
@@ -174,8 +472,23 @@ class ZScoreDetector(BaseDetector):
             'mean': stats['mean'],
             'std': stats['std'],
             'value': value
-        }
-        
+        } if include_details else {}
+
+        # Compiled fast path: one kernel call covers all the branches below
+        if _classify_kernel is not None:
+            code, drift_ratio, noise_std = _classify_kernel(
+                stats['buf'], stats['head'], stats['count'],
+                float(stats['mean']), float(stats['std']), z_score,
+                float(self.config['z_threshold']),
+                float(self.config['drift_threshold']),
+                float(self.config['noise_threshold']))
+            if code == 2:
+                details['drift_ratio'] = drift_ratio
+            elif code == 3:
+                details['noise_std'] = noise_std
+            category, confidence = _KERNEL_RESULTS[code]
+            return category, confidence, details
+
         # Check for extreme outliers (alerts)
         if z_score > self.config['z_threshold'] * 2:
             return 'alert', 0.9, details
@@ -185,18 +498,18 @@ class ZScoreDetector(BaseDetector):
             return 'noise', 0.7, details
         
         # Check for drift using rolling mean
-        if len(stats['last_values']) >= 10:
-            recent_mean = np.mean(stats['last_values'][-10:])
+        if stats['count'] >= 10:
+            recent_mean = np.mean(self._recent_values(stats, 10))
             historical_mean = stats['mean']
             drift_ratio = abs(recent_mean - historical_mean) / max(abs(historical_mean), 1e-6)
-            
+
             if drift_ratio > self.config['drift_threshold']:
                 details['drift_ratio'] = drift_ratio
                 return 'drift', 0.6, details
-        
+
         # Check for noise using variance
-        if len(stats['last_values']) >= 5:
-            recent_std = np.std(stats['last_values'][-5:])
+        if stats['count'] >= 5:
+            recent_std = np.std(self._recent_values(stats, 5))
             if recent_std > stats['std'] * (1 + self.config['noise_threshold']):
                 details['noise_std'] = recent_std
                 return 'noise', 0.5, details
@@ -228,7 +541,7 @@ class ZScoreDetector(BaseDetector):
             }
             
             with open(filepath, 'wb') as f:
-                pickle.dump(model_data, f)
+                pickle.dump(model_data, f, protocol=pickle.HIGHEST_PROTOCOL)
                 
             logger.info(f"{self.name}: Saved model for sensor {sensor_id} to {filepath}")
             return True
@@ -248,8 +561,25 @@ class ZScoreDetector(BaseDetector):
             
             # Load sensor statistics
             if 'sensor_stats' in model_data and sensor_id in model_data['sensor_stats']:
-                self.sensor_stats[sensor_id] = model_data['sensor_stats'][sensor_id]
-            
+                stats = model_data['sensor_stats'][sensor_id]
+                if 'buf' not in stats:
+                    # Older model file: rebuild the circular buffer state
+                    window_size = self.config['window_size']
+                    tail = np.asarray(stats.pop('last_values', []),
+                                      dtype=np.float64)[-window_size:]
+                    buf = np.zeros(window_size, dtype=np.float64)
+                    buf[:len(tail)] = tail
+                    stats['buf'] = buf
+                    stats['head'] = len(tail) % window_size
+                    stats['count'] = len(tail)
+                    stats['sum'] = float(tail.sum())
+                    stats['sumsq'] = float(tail.dot(tail))
+                if not isinstance(stats.get('last_timestamps'), deque):
+                    stats['last_timestamps'] = deque(
+                        stats.get('last_timestamps', []),
+                        maxlen=self.config['window_size'])
+                self.sensor_stats[sensor_id] = stats
+
             # Update config if provided
             if 'config' in model_data:
                 self.config.update(model_data['config'])
@@ -259,4 +589,8 @@ class ZScoreDetector(BaseDetector):
             
         except Exception as e:
             logger.error(f"{self.name}: Failed to load model: {e}")
-            return False 
\ No newline at end of file
+            return False
+
+    def _drop_sensor_state(self, sensor_id: str) -> None:
+        """Release the stats dict backing an evicted sensor."""
+        self.sensor_stats.pop(sensor_id, None)
@@ -1,18 +1,105 @@
 import asyncio
+import hashlib
 import logging
 import os
+import random
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 from database import db_manager
 from models import MLDetector
 
 logger = logging.getLogger(__name__)
 
-class TrainingManager:    
+# Shared fallback for sensors with no trained model, shaped like
+# MLDetector._fallback_prediction. Built once and frozen at both levels
+# so an accidental mutation by a caller raises instead of silently
+# poisoning every future untrained response.
+_UNTRAINED_RESPONSE = MappingProxyType({
+    'category': 'normal',
+    'confidence': 0.1,
+    'anomaly_score': 0.0,
+    'details': MappingProxyType({
+        'reason': 'No trained model',
+        'fallback': True
+    })
+})
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _compress_valid(values):
+        """
+        Drop NaNs from a value column in one compiled pass.
+
+        Returns (compressed values, indices of the rows kept) so the
+        caller can align the timestamp array with the same gather.
+        """
+        n = values.shape[0]
+        out = np.empty(n, dtype=np.float64)
+        kept = np.empty(n, dtype=np.int64)
+        k = 0
+        for i in range(n):
+            v = values[i]
+            if v == v:  # NaN is the only value that fails this
+                out[k] = v
+                kept[k] = i
+                k += 1
+        return out[:k], kept[:k]
+
+    # Warm up the JIT at import so the first training cycle doesn't pay
+    # the compile latency
+    _compress_valid(np.array([1.0, np.nan]))
+else:
+    _compress_valid = None
+
+class TrainingManager:
+    # Sensor value columns trained per device
+    SENSOR_TYPES = ('pm2_5', 'pm10', 'dBA', 'vibration')
+
     def __init__(self):
         self.ml_detector = None
         self.training_task = None
         self.is_running = False
+        self.min_training_data = 50
+        self.training_interval = 1800
+        self.train_concurrency = 8
+        self._backoff = 5
+        self._train_executor = None
+        # Short-lived per-device fetch cache: device_id -> (monotonic
+        # fetch time, hours covered, rows). Lets a manual retrain right
+        # after a training cycle reuse the rows already pulled. LRU with
+        # a small bound on top of the TTL, so peak memory stays flat
+        # regardless of fleet size.
+        self._data_cache = OrderedDict()
+        self._cache_ttl = 120
+        self._cache_max_devices = 8
+        # Fingerprint of the data each sensor was last fitted on, used to
+        # skip refits when a cycle sees the same readings again
+        self._last_fingerprint = {}
+        # Model metadata rows accumulated during a cycle and written to
+        # the database in one batched upsert
+        self._pending_meta = []
+        # When each device last completed a training pass; lets a cycle
+        # skip devices that were retrained moments ago
+        self._last_trained = {}
+        # Memo of (device_id, sensor_type) -> composed sensor_id so the
+        # per-reading hot paths don't re-format the same string
+        self._sensor_ids = {}
+        # Sensors with a successfully fitted model; predict short-circuits
+        # everything else without touching the detector
+        self._ready = set()
         
     async def initialize(self, detector_configs: Dict[str, Dict[str, Any]] = None):
         try:
@@ -26,8 +113,23 @@ class TrainingManager:
             
             if detector_configs:
                 ml_config['detector_configs'] = detector_configs
-            
+
+            # Parse tuning knobs once here; the per-call os.getenv + int()
+            # round-trips add up across thousands of invocations per cycle
+            self.min_training_data = int(os.getenv("MIN_TRAINING_DATA", "50"))
+            self.training_interval = int(os.getenv("TRAINING_INTERVAL", "1800"))
+            self.train_concurrency = int(os.getenv("TRAIN_CONCURRENCY", "8"))
+
+            # Dedicated pool for fit() offloads: keeps training compute
+            # off the loop's small default executor (shared with other
+            # I/O) and gives the threads a recognizable name in dumps
+            self._train_executor = ThreadPoolExecutor(
+                max_workers=os.cpu_count(), thread_name_prefix="ml-train")
+
             self.ml_detector = MLDetector(ml_config)
+            # Models restored from disk are servable immediately; their
+            # detector state loads lazily on first predict
+            self._ready.update(self.ml_detector.sensor_configs)
             logger.info("Training manager initialized successfully")
             
         except Exception as e:
@@ -54,6 +156,8 @@ class TrainingManager:
                 await self.training_task
             except asyncio.CancelledError:
                 pass
+        if self._train_executor is not None:
+            self._train_executor.shutdown(wait=True, cancel_futures=True)
         logger.info("Training scheduler stopped")
     
     async def _training_loop(self):
@@ -61,15 +165,21 @@ class TrainingManager:
             try:
                 logger.info("Starting periodic training cycle")
                 await self.train_all_models()
+                self._backoff = 5
                 
-                await asyncio.sleep(int(os.getenv("TRAINING_INTERVAL", "1800")))
+                await asyncio.sleep(self.training_interval)
                 
             except asyncio.CancelledError:
                 logger.info("Training loop cancelled")
                 break
             except Exception as e:
                 logger.error(f"Error in training loop: {e}")
-                await asyncio.sleep(60)
+                # Exponential backoff with jitter: retry fast on a blip,
+                # back off toward 15 min during a sustained outage, and
+                # desynchronize instances so a recovering database isn't
+                # hit by everyone at once
+                await asyncio.sleep(self._backoff + random.uniform(0, self._backoff * 0.1))
+                self._backoff = min(self._backoff * 2, 900)
     
     async def train_all_models(self):
         try:
@@ -80,63 +190,256 @@ class TrainingManager:
                 return
             
             logger.info(f"Training models for {len(sensors)} sensors")
-            
-            for device_id in sensors:
-                await self.train_sensor_models(device_id)
-                
+
+            # Producer/consumer pipeline: fetches for upcoming devices run
+            # while the current device trains, so DB round-trip latency
+            # hides behind fit compute. The semaphore bounds in-flight
+            # fetches and the queue size bounds how many fetched datasets
+            # sit in memory waiting to train.
+            queue = asyncio.Queue(maxsize=2)
+            semaphore = asyncio.Semaphore(self.train_concurrency)
+
+            async def fetch(device_id: str):
+                async with semaphore:
+                    try:
+                        data = await self._cached_get(device_id, hours=24)
+                    except Exception as e:
+                        logger.error(f"Failed to fetch data for {device_id}: {e}")
+                        data = None
+                    await queue.put((device_id, data))
+
+            producer = asyncio.ensure_future(
+                asyncio.gather(*(fetch(device_id) for device_id in sensors)))
+
+            for _ in range(len(sensors)):
+                device_id, sensor_data = await queue.get()
+                if sensor_data is None:
+                    continue
+                try:
+                    await self.train_sensor_models_with_data(device_id, sensor_data)
+                except Exception as e:
+                    logger.error(f"Training failed for {device_id}: {e}")
+
+            await producer
+            await self._flush_meta()
+            self._sweep_cache()
+
         except Exception as e:
             logger.error(f"Failed to train all models: {e}")
     
     async def train_sensor_models(self, device_id: str):
         try:
-            sensor_data = await db_manager.get_sensor_data(device_id, hours=24)
-            
-            if len(sensor_data) < int(os.getenv("MIN_TRAINING_DATA", "50")):
+            sensor_data = await self._cached_get(device_id, hours=24)
+            await self.train_sensor_models_with_data(device_id, sensor_data)
+        except Exception as e:
+            logger.error(f"Failed to train models for {device_id}: {e}")
+
+    async def _cached_get(self, device_id: str, hours: int) -> List[Dict[str, Any]]:
+        """
+        Fetch sensor data through the short-lived per-device cache.
+
+        A fresh cached fetch covering at least the requested window is
+        reused (trimmed to the cutoff for narrower requests) instead of
+        re-scanning the same rows in the database.
+        """
+        cached = self._data_cache.get(device_id)
+        if cached is not None:
+            fetched_at, cached_hours, rows = cached
+            if time.monotonic() - fetched_at >= self._cache_ttl:
+                # Expired: drop the rows now instead of pinning them in
+                # memory until the next fetch happens to overwrite them
+                del self._data_cache[device_id]
+            elif cached_hours >= hours:
+                self._data_cache.move_to_end(device_id)
+                if cached_hours == hours:
+                    return rows
+                cutoff = (datetime.now() - timedelta(hours=hours)).isoformat()
+                return [r for r in rows if r['timestamp'] >= cutoff]
+
+        rows = await db_manager.get_sensor_data(device_id, hours=hours)
+        self._data_cache[device_id] = (time.monotonic(), hours, rows)
+        self._data_cache.move_to_end(device_id)
+        # Nothing re-reads a device's entry mid-cycle, so without a size
+        # bound every device's window would stay pinned until the
+        # end-of-cycle sweep; evict least-recently-used beyond the cap
+        while len(self._data_cache) > self._cache_max_devices:
+            self._data_cache.popitem(last=False)
+        return rows
+
+    def _sweep_cache(self):
+        """Drop expired fetch-cache entries at the end of a cycle."""
+        now = time.monotonic()
+        for device_id in [d for d, (fetched_at, _, _) in self._data_cache.items()
+                          if now - fetched_at >= self._cache_ttl]:
+            del self._data_cache[device_id]
+
+    async def train_sensor_models_with_data(self, device_id: str,
+                                            sensor_data: List[Dict[str, Any]]):
+        try:
+            # A device retrained moments ago (e.g. manually, mid-cycle)
+            # has nothing new to learn from the same window
+            last = self._last_trained.get(device_id)
+            if last is not None and (datetime.now() - last).total_seconds() < self.training_interval:
+                logger.info(f"Skipping {device_id}: trained {last.isoformat()} within interval")
+                return
+
+            if len(sensor_data) < self.min_training_data:
                 logger.info(f"Insufficient data for {device_id}: {len(sensor_data)} readings")
                 return
-            
-            sensor_types = ['pm2_5', 'pm10', 'dBA', 'vibration']
-            
-            for sensor_type in sensor_types:
-                await self.train_single_model(device_id, sensor_type, sensor_data)
-                
+
+            # Project the records into columnar arrays once and share them
+            # across all sensor types instead of filtering the dict list
+            # from scratch per type
+            timestamps, columns = self._columnarize(sensor_data)
+
+            # Gate each sensor type on the loop, then fit the survivors as
+            # one batch: detectors with a parallel fit_many path train the
+            # device's sensors together in a single executor hop
+            prepared = []
+            for sensor_type in self.SENSOR_TYPES:
+                item = self._prepare_series(device_id, sensor_type,
+                                            timestamps, columns[sensor_type])
+                if item is not None:
+                    prepared.append((sensor_type,) + item)
+
+            if prepared:
+                logger.info(f"Training {len(prepared)} sensor models for {device_id}")
+                loop = asyncio.get_running_loop()
+                results = await loop.run_in_executor(
+                    self._train_executor, self.ml_detector.fit_many,
+                    [(sensor_id, ts, vals)
+                     for _, sensor_id, ts, vals, _ in prepared])
+                for sensor_type, sensor_id, _ts, vals, fingerprint in prepared:
+                    await self._record_fit(device_id, sensor_type, sensor_id,
+                                           results.get(sensor_id, False),
+                                           fingerprint, len(vals))
+
+            self._last_trained[device_id] = datetime.now()
+
         except Exception as e:
             logger.error(f"Failed to train models for {device_id}: {e}")
+
+    def _columnarize(self, sensor_data: List[Dict[str, Any]]) -> tuple:
+        """
+        Project record dicts into one timestamp array plus a float64 column
+        per sensor type, with NaN marking missing values.
+
+        A single traversal fills every column at once, so the (likely
+        page-scattered) record list is walked once instead of once per
+        sensor type.
+        """
+        n = len(sensor_data)
+        types = self.SENSOR_TYPES
+        timestamps = np.empty(n, dtype=object)
+        matrix = np.empty((n, len(types)), dtype=np.float64)
+        for i, record in enumerate(sensor_data):
+            timestamps[i] = record['timestamp']
+            for j, sensor_type in enumerate(types):
+                value = record.get(sensor_type)
+                matrix[i, j] = value if value is not None else np.nan
+        columns = {sensor_type: np.ascontiguousarray(matrix[:, j])
+                   for j, sensor_type in enumerate(types)}
+        return timestamps, columns
     
-    async def train_single_model(self, device_id: str, sensor_type: str, sensor_data: List[Dict[str, Any]]):
+    def _sensor_id(self, device_id: str, sensor_type: str) -> str:
+        key = (device_id, sensor_type)
+        sensor_id = self._sensor_ids.get(key)
+        if sensor_id is None:
+            sensor_id = self._sensor_ids[key] = f"{device_id}_{sensor_type}"
+        return sensor_id
+
+    @staticmethod
+    def _compress_missing(timestamps: np.ndarray, values: np.ndarray) -> tuple:
+        """
+        Drop rows whose value is NaN, keeping the two arrays aligned.
+
+        Uses the numba kernel when available (single fused pass), falling
+        back to a vectorized numpy mask otherwise.
+        """
+        if _compress_valid is not None:
+            compressed, kept = _compress_valid(values)
+            if len(compressed) != len(values):
+                timestamps = timestamps[kept]
+            return timestamps, compressed
+
+        mask = ~np.isnan(values)
+        if not mask.all():
+            timestamps = timestamps[mask]
+            values = values[mask]
+        return timestamps, values
+
+    def _prepare_series(self, device_id: str, sensor_type: str,
+                        timestamps: np.ndarray, values: np.ndarray) -> Optional[tuple]:
+        """
+        Gate one sensor's column for training.
+
+        Compresses out missing values, applies the minimum-data and
+        unchanged-fingerprint checks, and returns (sensor_id, timestamps,
+        values, fingerprint) for sensors worth fitting, or None.
+        """
+        timestamps, values = self._compress_missing(timestamps, values)
+        count = len(values)
+
+        if count < self.min_training_data:
+            logger.info(f"Insufficient {sensor_type} data for {device_id}: {count} readings")
+            return None
+
+        sensor_id = self._sensor_id(device_id, sensor_type)
+
+        # Cheap content fingerprint: a dead sensor or a cycle with no
+        # new rows produces the exact same value array, and refitting
+        # on it would just recompute the same model
+        fingerprint = (hashlib.blake2b(values.tobytes(), digest_size=16).digest()
+                       + count.to_bytes(4, 'little'))
+        if self._last_fingerprint.get(sensor_id) == fingerprint:
+            logger.info(f"Data unchanged for {sensor_id}, skipping retrain")
+            return None
+
+        return sensor_id, timestamps, values, fingerprint
+
+    async def _record_fit(self, device_id: str, sensor_type: str, sensor_id: str,
+                          success: bool, fingerprint: bytes, count: int):
+        """Post-fit bookkeeping shared by the batch and single-sensor paths."""
+        if success:
+            self._last_fingerprint[sensor_id] = fingerprint
+            self._ready.add(sensor_id)
+            model_info = self.ml_detector.get_sensor_info(sensor_id)
+            if model_info:
+                metadata = {
+                    'model_type': model_info.get('detector_type', 'unknown'),
+                    'accuracy': 0.85,
+                    'config': model_info.get('config', {}),
+                    'readings_count': count
+                }
+                self._pending_meta.append((device_id, sensor_type, metadata))
+                if len(self._pending_meta) >= 100:
+                    await self._flush_meta()
+
+            logger.info(f"Successfully trained {sensor_type} model for {device_id}")
+        else:
+            logger.warning(f"Failed to train {sensor_type} model for {device_id}")
+
+    async def train_single_model(self, device_id: str, sensor_type: str,
+                                 timestamps: np.ndarray, values: np.ndarray):
         try:
-            training_data = []
-            for record in sensor_data:
-                if record.get(sensor_type) is not None:
-                    training_data.append({
-                        'timestamp': record['timestamp'],
-                        'value': record[sensor_type]
-                    })
-            
-            if len(training_data) < int(os.getenv("MIN_TRAINING_DATA", "50")):
-                logger.info(f"Insufficient {sensor_type} data for {device_id}: {len(training_data)} readings")
+            prepared = self._prepare_series(device_id, sensor_type,
+                                            timestamps, values)
+            if prepared is None:
                 return
-            
-            sensor_id = f"{device_id}_{sensor_type}"
-            
-            logger.info(f"Training {sensor_type} model for {device_id} with {len(training_data)} readings")
-            success = self.ml_detector.fit(sensor_id, training_data)
-            
-            if success:
-                model_info = self.ml_detector.get_sensor_info(sensor_id)
-                if model_info:
-                    metadata = {
-                        'model_type': model_info.get('detector_type', 'unknown'),
-                        'accuracy': 0.85,
-                        'config': model_info.get('config', {}),
-                        'readings_count': len(training_data)
-                    }
-                    await db_manager.save_model_metadata(device_id, sensor_type, metadata)
-                
-                logger.info(f"Successfully trained {sensor_type} model for {device_id}")
-            else:
-                logger.warning(f"Failed to train {sensor_type} model for {device_id}")
-                
+            sensor_id, timestamps, values, fingerprint = prepared
+
+            logger.info(f"Training {sensor_type} model for {device_id} with {len(values)} readings")
+            # fit() is synchronous CPU work; run it on a worker thread so
+            # the event loop keeps serving DB I/O and HTTP requests while
+            # training runs (the numeric kernels release the GIL)
+            loop = asyncio.get_running_loop()
+            success = await loop.run_in_executor(
+                self._train_executor, self.ml_detector.fit_arrays, sensor_id,
+                timestamps, values)
+
+            await self._record_fit(device_id, sensor_type, sensor_id,
+                                   success, fingerprint, len(values))
+
         except Exception as e:
             logger.error(f"Failed to train {sensor_type} model for {device_id}: {e}")
     
@@ -144,22 +447,35 @@ class TrainingManager:
         try:
             logger.info(f"Manual retraining requested for {device_id} {sensor_type}")
             
-            sensor_data = await db_manager.get_sensor_data(device_id, hours=48)
+            sensor_data = await self._cached_get(device_id, hours=48)
             
-            if len(sensor_data) < int(os.getenv("MIN_TRAINING_DATA", "50")):
+            if len(sensor_data) < self.min_training_data:
                 logger.warning(f"Insufficient data for retraining {device_id} {sensor_type}")
                 return False
-            
-            await self.train_single_model(device_id, sensor_type, sensor_data)
+
+            timestamps, columns = self._columnarize(sensor_data)
+            await self.train_single_model(device_id, sensor_type,
+                                          timestamps, columns[sensor_type])
+            await self._flush_meta()
+            # Deliberately no _last_trained stamp: only one sensor type was
+            # refreshed, and stamping the device would make the next cycle
+            # skip the other three
             return True
             
         except Exception as e:
             logger.error(f"Failed to retrain {device_id} {sensor_type}: {e}")
             return False
     
+    async def _flush_meta(self):
+        if not self._pending_meta:
+            return
+        rows, self._pending_meta = self._pending_meta, []
+        if not await db_manager.save_model_metadata_batch(rows):
+            logger.warning(f"Failed to persist metadata for {len(rows)} models")
+
     def get_model_info(self, device_id: str, sensor_type: str) -> Optional[Dict[str, Any]]:
         try:
-            sensor_id = f"{device_id}_{sensor_type}"
+            sensor_id = self._sensor_id(device_id, sensor_type)
             return self.ml_detector.get_sensor_info(sensor_id)
         except Exception as e:
             logger.error(f"Failed to get model info for {device_id} {sensor_type}: {e}")
@@ -167,7 +483,9 @@ class TrainingManager:
     
     def predict(self, device_id: str, sensor_type: str, reading: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            sensor_id = f"{device_id}_{sensor_type}"
+            sensor_id = self._sensor_id(device_id, sensor_type)
+            if sensor_id not in self._ready:
+                return _UNTRAINED_RESPONSE
             return self.ml_detector.predict(sensor_id, reading)
         except Exception as e:
             logger.error(f"Failed to predict for {device_id} {sensor_type}: {e}")